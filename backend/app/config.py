@@ -14,8 +14,34 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
 
+    # Startup
+    WARMUP_ON_STARTUP: bool = True
+
+    # Chat
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: int = 3600
+    PRECOMPUTED_MATCH_THRESHOLD: float = 0.85  # cosine similarity to a question cluster's centroid
+
     # ChromaDB
     CHROMA_PERSIST_DIRECTORY: str = "./chroma_db"
+    COLLECTION_RETENTION_HOURS: int = 24
+
+    # Vector index
+    VECTOR_INDEX_BACKEND: str = "chroma"  # chroma | local
+    EMBEDDING_QUANTIZATION: str = "none"  # none | int8 | binary (local index only)
+    RESCORE_OVERSAMPLE: int = 4
+    EXACT_SEARCH_MAX_PARTITION: int = 20000  # subject filters at or below this size skip the ANN
+    PREFILTER_CACHE_MB: int = 256  # cached subject vectors per worker, shared by every collection version
+
+    # Profiling
+    PROFILE_SAMPLE_RATE: float = 0.01  # share of API requests profiled regardless of latency
+    PROFILE_SLOW_REQUEST_MS: int = 10000  # requests slower than this are always kept (0 disables)
+    PROFILE_SLOW_START_FRACTION: float = 0.5  # other requests start stack sampling at this share of the threshold
+    PROFILE_MAX_IN_FLIGHT: int = 4  # requests stack-sampled at once
+    PROFILE_INTERVAL_MS: int = 10
+    PROFILE_DIRECTORY: str = "./profiles"
+    PROFILE_MAX_FILES: int = 200
+    ADMIN_TOKEN: str = ""  # X-Admin-Token for /api/admin; admin endpoints are off when empty
 
     class Config:
         env_file = ".env"
@@ -1,24 +1,75 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, status
+from brotli_asgi import BrotliMiddleware
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
-from app.database import engine, Base
-from app.routers import chat, history
+from sqlalchemy import text
+from app.config import get_settings
+from app.database import SessionLocal, engine
+from app.routers import admin, chat, history
+from app.utils.profiling import ProfilingMiddleware, install_db_hooks
+from app.utils.responses import FastJSONResponse
+
+settings = get_settings()
+
+warmup_state = {"done": False, "error": None}
+
+
+def warm_up():
+    # Open the Chroma client and load the OpenAI SDK off the request path
+    try:
+        import openai  # noqa: F401
+        from app.services.vectordb import VectorDBService
+
+        VectorDBService().collection
+        warmup_state["done"] = True
+    except Exception as e:
+        warmup_state["error"] = str(e)
+
+
+def purge_idempotency_keys():
+    from app.services.request_dedup import purge_expired
+
+    db = SessionLocal()
+    try:
+        purge_expired(db)
+    finally:
+        db.close()
+
+
+async def purge_idempotency_keys_periodically():
+    # Clients send a fresh key per click, so most keys never come back to be expired on read
+    while True:
+        try:
+            await asyncio.to_thread(purge_idempotency_keys)
+        except Exception:
+            # The database may be briefly unreachable; the next round catches up
+            pass
+        await asyncio.sleep(settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create database tables on startup
-    Base.metadata.create_all(bind=engine)
+    # Schema changes run as a separate step (scripts/migrate.py), not on every boot
+    if settings.WARMUP_ON_STARTUP:
+        app.state.warmup = asyncio.create_task(asyncio.to_thread(warm_up))
+    purge = asyncio.create_task(purge_idempotency_keys_periodically())
     yield
+    purge.cancel()
 
 
 app = FastAPI(
     title="세부능력특기사항 RAG 서비스",
     description="학생들의 세부능력특기사항 작성을 도와주는 RAG 기반 서비스",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
+# Brotli for clients that accept it, gzip otherwise; history pages are large Korean-text payloads
+app.add_middleware(BrotliMiddleware, minimum_size=1000, gzip_fallback=True)
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -28,9 +79,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so profiles cover the whole request including compression
+app.add_middleware(
+    ProfilingMiddleware,
+    store=admin.profile_store,
+    sample_rate=settings.PROFILE_SAMPLE_RATE,
+    slow_request_ms=settings.PROFILE_SLOW_REQUEST_MS,
+    interval_ms=settings.PROFILE_INTERVAL_MS,
+    slow_start_fraction=settings.PROFILE_SLOW_START_FRACTION,
+    max_in_flight=settings.PROFILE_MAX_IN_FLIGHT
+)
+install_db_hooks(engine)
+
 # Include routers
 app.include_router(chat.router)
 app.include_router(history.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
@@ -43,5 +107,33 @@ async def root():
 
 
 @app.get("/health")
+@app.get("/health/live")
 async def health_check():
+    # Liveness: the process is up and serving; no dependency checks
     return {"status": "healthy"}
+
+
+@app.get("/health/ready")
+def readiness_check():
+    checks = {}
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        checks["database"] = "ok"
+    except Exception as e:
+        checks["database"] = f"error: {e}"
+
+    # Not gated on the warm-up: the vector DB also opens on first use, and waiting for it
+    # here would keep a new replica out of rotation for the Chroma import and client start
+    if not settings.WARMUP_ON_STARTUP:
+        warmup = "disabled"
+    elif warmup_state["error"]:
+        warmup = f"error: {warmup_state['error']}"
+    else:
+        warmup = "done" if warmup_state["done"] else "in progress"
+
+    ready = all(value == "ok" for value in checks.values())
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if ready else "not ready", "checks": checks, "warmup": warmup}
+    )
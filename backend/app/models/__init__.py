@@ -1,3 +1,5 @@
 from app.models.user import ChatHistory
+from app.models.precomputed_answer import PrecomputedAnswer
+from app.models.idempotency_key import IdempotencyKey
 
-__all__ = ["ChatHistory"]
+__all__ = ["ChatHistory", "PrecomputedAnswer", "IdempotencyKey"]
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, LargeBinary, String, DateTime, Text, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class PrecomputedAnswer(Base):
+    __tablename__ = "precomputed_answers"
+    __table_args__ = (
+        # A chat request scans the centroids of its subject for the current corpus version
+        Index("ix_precomputed_answers_subject_version", "subject", "corpus_version"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    subject = Column(String(100), nullable=False)
+    question = Column(Text, nullable=False)
+    answer = Column(Text, nullable=False)
+    # Unit-length float32 centroid of the question cluster's embeddings
+    centroid = Column(LargeBinary, nullable=False)
+    corpus_version = Column(String(255), nullable=False)
+    source_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,13 +1,17 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
 
 class ChatHistory(Base):
     __tablename__ = "chat_histories"
+    __table_args__ = (
+        # Subject + date range filters for history pages, export and stats
+        Index("ix_chat_histories_subject_created_at", "subject", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     subject = Column(String(100), nullable=False)
     question = Column(Text, nullable=False)
     answer = Column(Text, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,53 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from app.config import get_settings
+from app.schemas import ProfileListResponse
+from app.utils.profiling import ProfileStore, folded_stacks
+from app.utils.responses import FastJSONResponse
+
+settings = get_settings()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    # Admin endpoints are disabled unless ADMIN_TOKEN is configured
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token"
+        )
+
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+# Written by ProfilingMiddleware, read here
+profile_store = ProfileStore(settings.PROFILE_DIRECTORY, settings.PROFILE_MAX_FILES)
+
+
+def load_profile(profile_id: str) -> dict:
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return profile
+
+
+@router.get("/profiles", response_model=ProfileListResponse)
+def list_profiles(limit: int = Query(50, ge=1, le=500)):
+    return ProfileListResponse(profiles=profile_store.list(limit))
+
+
+@router.get("/profiles/{profile_id}")
+def get_profile(profile_id: str):
+    return FastJSONResponse(load_profile(profile_id))
+
+
+@router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+def get_profile_folded(profile_id: str):
+    # Collapsed stacks for flamegraph.pl or https://www.speedscope.app
+    return PlainTextResponse(folded_stacks(load_profile(profile_id)))
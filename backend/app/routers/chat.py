@@ -1,9 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import traceback
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import SessionLocal, get_db
 from app.models.user import ChatHistory
-from app.schemas import ChatRequest, ChatResponse, SubjectListResponse
+from app.schemas import ChatRequest, ChatResponse, SubjectListResponse, TargetListResponse
+from app.services.precomputed_answers import find_precomputed_answer
 from app.services.rag_service import RAGService
+from app.services.request_dedup import (
+    IdempotencyKeyMismatch,
+    SingleFlight,
+    find_replay,
+    remember,
+    request_fingerprint
+)
+from app.services.vectordb import UnknownTarget, VectorDBService
+from app.utils.profiling import run_in_thread, trace_record, trace_stage
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
@@ -24,41 +36,125 @@ SUBJECTS = [
     "수학과제탐구", "고전과윤리", "생활과한문", "민주시민"
 ]
 
+# Collapses double-clicks and retries of the same request into one RAG call and one history row
+chat_flight = SingleFlight()
+
 
 @router.get("/subjects", response_model=SubjectListResponse)
 async def get_subjects():
     return SubjectListResponse(subjects=sorted(SUBJECTS))
 
 
-@router.post("", response_model=ChatResponse)
-async def chat(
-    request: ChatRequest,
-    db: Session = Depends(get_db)
-):
-    try:
-        # Initialize RAG service
-        rag_service = RAGService()
+@router.get("/targets", response_model=TargetListResponse)
+async def get_targets():
+    tenants = VectorDBService().list_tenants()
+    targets = sorted({(t["university"], t["department"]) for t in tenants})
+    return TargetListResponse(
+        targets=[{"university": u, "department": d} for u, d in targets]
+    )
 
-        # Get answer from RAG
-        answer = await rag_service.get_answer(
-            subject=request.subject,
-            question=request.question
-        )
 
-        # Save to chat history
-        chat_history = ChatHistory(
-            subject=request.subject,
-            question=request.question,
-            answer=answer
+def find_cached_answer(request: ChatRequest, db: Session) -> Tuple[RAGService, List[float], Optional[str]]:
+    vectordb = VectorDBService()
+    rag_service = RAGService()
+    aliases = vectordb.route(request.university, request.department, request.subject)
+
+    # The question embedding is computed once: it picks a pre-generated answer for a
+    # popular question cluster, and otherwise drives the retrieval
+    query_embedding = rag_service.embed_question(request.subject, request.question, aliases)
+    with trace_stage("precomputed_lookup"):
+        answer = find_precomputed_answer(
+            db, request.subject, query_embedding, vectordb.corpus_version(aliases)
         )
+    trace_record(precomputed=answer is not None)
+    return rag_service, query_embedding, answer
 
+
+def find_replay_history(db: Session, key: str, fingerprint: str) -> Optional[ChatHistory]:
+    history_id = find_replay(db, key, fingerprint)
+    if history_id is None:
+        return None
+    return db.query(ChatHistory).filter(ChatHistory.id == history_id).first()
+
+
+def save_history(db: Session, request: ChatRequest, answer: str) -> ChatResponse:
+    chat_history = ChatHistory(
+        subject=request.subject,
+        question=request.question,
+        answer=answer
+    )
+
+    with trace_stage("save_history"):
         db.add(chat_history)
         db.commit()
         db.refresh(chat_history)
 
-        return chat_history
+    return ChatResponse.model_validate(chat_history)
+
+
+async def answer_and_save(request: ChatRequest) -> ChatResponse:
+    # The OpenAI, Chroma and DB calls block, so they run in worker threads. The event loop
+    # stays free meanwhile, which is what lets identical requests join this one in chat_flight.
+    # Shared by every request that joined, so it has its own session rather than the first
+    # request's, which is closed if that request is cancelled.
+    db = SessionLocal()
+    try:
+        rag_service, query_embedding, answer = await run_in_thread(find_cached_answer, request, db)
+
+        if answer is None:
+            # Get answer from RAG
+            answer = await rag_service.get_answer(
+                subject=request.subject,
+                question=request.question,
+                university=request.university,
+                department=request.department,
+                query_embedding=query_embedding
+            )
 
+        # Save to chat history
+        return await run_in_thread(save_history, db, request, answer)
+    finally:
+        db.close()
+
+
+@router.post("", response_model=ChatResponse)
+async def chat(
+    request: ChatRequest,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
+):
+    fingerprint = request_fingerprint(**request.model_dump())
+
+    try:
+        if idempotency_key:
+            history = await run_in_thread(find_replay_history, db, idempotency_key, fingerprint)
+            if history:
+                return history
+
+        response = await chat_flight.do(fingerprint, lambda: answer_and_save(request))
+
+        if idempotency_key:
+            await run_in_thread(remember, db, idempotency_key, fingerprint, response.id)
+
+        return response
+
+    except UnknownTarget as e:
+        available = ", ".join(f"{t['university']} {t['department']}" for t in e.available) or "none"
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=(
+                f"No corpus for university={e.university!r}, department={e.department!r}. "
+                f"Available targets (GET /api/chat/targets): {available}"
+            )
+        )
+    except IdempotencyKeyMismatch:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request"
+        )
     except Exception as e:
+        # The client only gets the message; keep the traceback with the request's profile
+        trace_record(error=traceback.format_exc())
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error processing chat: {str(e)}"
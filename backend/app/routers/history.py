@@ -1,13 +1,34 @@
+import csv
+import io
+import json
+from datetime import datetime
 from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import Optional
-from app.database import get_db
+from sqlalchemy import desc, func, select
+from typing import Iterator, Optional
+from app.database import get_db, SessionLocal
 from app.models.user import ChatHistory
-from app.schemas import ChatHistoryResponse, ChatResponse
+from app.schemas import ChatHistoryResponse, ChatResponse, HistoryStatsResponse
+from app.utils.responses import FastJSONResponse
 
 router = APIRouter(prefix="/api/history", tags=["history"])
 
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = ["id", "subject", "question", "answer", "created_at"]
+# Same fields as ChatResponse, selected as plain columns so no ORM objects are built
+RESPONSE_COLUMNS = [getattr(ChatHistory, field) for field in ChatResponse.model_fields]
+
+
+def apply_filters(query, subject: Optional[str], start: Optional[datetime], end: Optional[datetime]):
+    if subject:
+        query = query.filter(ChatHistory.subject == subject)
+    if start:
+        query = query.filter(ChatHistory.created_at >= start)
+    if end:
+        query = query.filter(ChatHistory.created_at < end)
+    return query
+
 
 @router.get("", response_model=ChatHistoryResponse)
 async def get_history(
@@ -22,11 +43,118 @@ async def get_history(
         query = query.filter(ChatHistory.subject == subject)
 
     total = query.count()
-    histories = query.order_by(desc(ChatHistory.created_at)).offset(skip).limit(limit).all()
+    rows = query.with_entities(*RESPONSE_COLUMNS).order_by(
+        desc(ChatHistory.created_at)
+    ).offset(skip).limit(limit).all()
+
+    # Rows come straight from the DB with the ChatResponse shape, so skip revalidation
+    # and serialize the dicts with orjson (response_model still documents the contract)
+    return FastJSONResponse({
+        "histories": [row._asdict() for row in rows],
+        "total": total
+    })
+
+
+def iter_export(
+    export_format: str,
+    subject: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime]
+) -> Iterator[str]:
+    # The request-scoped session is closed before the body streams, so the export owns its own
+    db = SessionLocal()
+    try:
+        stmt = select(*(getattr(ChatHistory, c) for c in EXPORT_COLUMNS))
+        stmt = apply_filters(stmt.order_by(ChatHistory.id), subject, start, end)
+        # Server-side cursor: rows are fetched in batches instead of loading the whole result
+        result = db.execute(stmt.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            # BOM so spreadsheet tools open the Korean text as UTF-8
+            buffer.write("\ufeff")
+            writer.writerow(EXPORT_COLUMNS)
+            for rows in result.partitions():
+                for row in rows:
+                    writer.writerow([*row[:4], row.created_at.isoformat() if row.created_at else ""])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for rows in result.partitions():
+                yield "".join(
+                    json.dumps({
+                        "id": row.id,
+                        "subject": row.subject,
+                        "question": row.question,
+                        "answer": row.answer,
+                        "created_at": row.created_at.isoformat() if row.created_at else None
+                    }, ensure_ascii=False) + "\n"
+                    for row in rows
+                )
+    finally:
+        db.close()
+
+
+@router.get("/export")
+def export_history(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    subject: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+):
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    filename = f"chat_histories.{format}"
+    return StreamingResponse(
+        iter_export(format, subject, start, end),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/stats", response_model=HistoryStatsResponse)
+def get_history_stats(
+    subject: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    # Aggregated in SQL over the (subject, created_at) index; only summary rows reach Python
+    per_subject = apply_filters(
+        db.query(
+            ChatHistory.subject,
+            func.count(ChatHistory.id).label("count"),
+            func.avg(func.char_length(ChatHistory.answer)).label("avg_answer_length"),
+            func.min(ChatHistory.created_at).label("first_at"),
+            func.max(ChatHistory.created_at).label("last_at")
+        ),
+        subject, start, end
+    ).group_by(ChatHistory.subject).order_by(desc("count")).all()
+
+    day = func.date(ChatHistory.created_at).label("day")
+    volume = apply_filters(
+        db.query(day, ChatHistory.subject, func.count(ChatHistory.id).label("count")),
+        subject, start, end
+    ).group_by(day, ChatHistory.subject).order_by(day, ChatHistory.subject).all()
 
-    return ChatHistoryResponse(
-        histories=[ChatResponse.model_validate(h) for h in histories],
-        total=total
+    return HistoryStatsResponse(
+        subjects=[
+            {
+                "subject": row.subject,
+                "count": row.count,
+                "avg_answer_length": float(row.avg_answer_length or 0),
+                "first_at": row.first_at,
+                "last_at": row.last_at
+            }
+            for row in per_subject
+        ],
+        volume=[
+            {"date": str(row.day), "subject": row.subject, "count": row.count}
+            for row in volume
+        ],
+        total=sum(row.count for row in per_subject)
     )
 
 
@@ -6,7 +6,14 @@ from app.schemas.schemas import (
     ChatRequest,
     ChatResponse,
     ChatHistoryResponse,
-    SubjectListResponse
+    SubjectStats,
+    VolumePoint,
+    HistoryStatsResponse,
+    SubjectListResponse,
+    Target,
+    TargetListResponse,
+    ProfileSummary,
+    ProfileListResponse
 )
 
 __all__ = [
@@ -17,5 +24,12 @@ __all__ = [
     "ChatRequest",
     "ChatResponse",
     "ChatHistoryResponse",
-    "SubjectListResponse"
+    "SubjectStats",
+    "VolumePoint",
+    "HistoryStatsResponse",
+    "SubjectListResponse",
+    "Target",
+    "TargetListResponse",
+    "ProfileSummary",
+    "ProfileListResponse"
 ]
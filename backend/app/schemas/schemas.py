@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 
 # User Schemas
@@ -34,6 +34,8 @@ class Token(BaseModel):
 class ChatRequest(BaseModel):
     subject: str
     question: str
+    university: Optional[str] = None
+    department: Optional[str] = None
 
 
 class ChatResponse(BaseModel):
@@ -52,5 +54,52 @@ class ChatHistoryResponse(BaseModel):
     total: int
 
 
+class SubjectStats(BaseModel):
+    subject: str
+    count: int
+    avg_answer_length: float
+    first_at: Optional[datetime] = None
+    last_at: Optional[datetime] = None
+
+
+class VolumePoint(BaseModel):
+    date: str
+    subject: str
+    count: int
+
+
+class HistoryStatsResponse(BaseModel):
+    subjects: List[SubjectStats]
+    volume: List[VolumePoint]
+    total: int
+
+
 class SubjectListResponse(BaseModel):
     subjects: List[str]
+
+
+class Target(BaseModel):
+    university: str
+    department: str
+
+
+class TargetListResponse(BaseModel):
+    targets: List[Target]
+
+
+class ProfileSummary(BaseModel):
+    id: str
+    created_at: float
+    method: Optional[str] = None
+    path: str
+    status: int
+    duration_ms: float
+    reason: str
+    sampled_from_ms: Optional[float] = None
+    samples: int
+    interval_ms: float
+    trace: Dict[str, Any]
+
+
+class ProfileListResponse(BaseModel):
+    profiles: List[ProfileSummary]
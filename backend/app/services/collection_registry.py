@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from app.config import get_settings
+
+settings = get_settings()
+
+DEFAULT_ALIAS = "setuek_collection"
+DEFAULT_UNIVERSITY = "상명대학교"
+DEFAULT_DEPARTMENT = "컴퓨터과학과"
+REGISTRY_FILE = "collection_aliases.json"
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def _exclusive_lock(path: Path) -> Iterator[None]:
+    """Block until this process holds the lock file (also across processes)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    # LK_LOCK itself only retries for about 10 seconds
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def tenant_alias(university: str, department: str) -> str:
+    # Chroma collection names must be ASCII, so tenants other than the original corpus get a hashed alias
+    if (university, department) == (DEFAULT_UNIVERSITY, DEFAULT_DEPARTMENT):
+        return DEFAULT_ALIAS
+    digest = hashlib.sha1(f"{university}/{department}".encode("utf-8")).hexdigest()[:12]
+    return f"setuek_{digest}"
+
+
+class CollectionRegistry:
+    """
+    Alias pointers for versioned collections (e.g. setuek_collection -> setuek_collection_v3).
+
+    The pointer file is replaced atomically, so readers always see either the
+    old or the new version, never a half-built collection. Writers (ingestion,
+    rollback, gc) hold an exclusive lock from reading the file to replacing it,
+    so concurrent runs don't drop each other's updates.
+    """
+
+    def __init__(self, persist_directory: Optional[str] = None):
+        self.path = Path(persist_directory or settings.CHROMA_PERSIST_DIRECTORY) / REGISTRY_FILE
+        self._data: Dict[str, Any] = {"aliases": {}}
+        self._mtime: Optional[int] = None
+
+    def load(self) -> Dict[str, Any]:
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._data, self._mtime = {"aliases": {}}, None
+            return self._data
+
+        if mtime != self._mtime:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._data = json.load(f)
+            self._mtime = mtime
+        return self._data
+
+    def _update(self, change: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Apply `change` to a fresh copy of the file and save it, under the writer lock."""
+        with _exclusive_lock(self.path.with_name(self.path.name + ".lock")):
+            # Re-read even when the mtime looks unchanged; another writer may have just saved
+            self._mtime = None
+            data = json.loads(json.dumps(self.load()))
+            result = change(data)
+            self._save(data)
+        return result
+
+    def _save(self, data: Dict[str, Any]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._data, self._mtime = data, None
+
+    def _entry(self, data: Dict[str, Any], alias: str) -> Dict[str, Any]:
+        return data.setdefault("aliases", {}).setdefault(
+            alias, {"active": None, "previous": None, "retired": {}}
+        )
+
+    def get_active(self, alias: str = DEFAULT_ALIAS) -> Optional[str]:
+        entry = self.load().get("aliases", {}).get(alias)
+        return entry["active"] if entry else None
+
+    def get_alias(self, alias: str = DEFAULT_ALIAS) -> Optional[Dict[str, Any]]:
+        return self.load().get("aliases", {}).get(alias)
+
+    def list_aliases(self) -> Dict[str, Dict[str, Any]]:
+        return self.load().get("aliases", {})
+
+    def next_version_name(self, alias: str, existing_names: Iterable[str]) -> str:
+        pattern = re.compile(rf"^{re.escape(alias)}_v(\d+)$")
+        entry = self.get_alias(alias) or {}
+        known = list(existing_names) + [entry.get("active") or ""] + list(entry.get("retired", {}))
+        versions = [int(m.group(1)) for m in (pattern.match(n) for n in known) if m]
+        return f"{alias}_v{max(versions, default=0) + 1}"
+
+    def _activate(self, data: Dict[str, Any], alias: str, name: str,
+                  tenant: Optional[Dict[str, Any]] = None, existing_names: Iterable[str] = ()):
+        entry = self._entry(data, alias)
+        if tenant is not None:
+            entry["tenant"] = tenant
+        old = entry.get("active")
+        if old is None and alias in existing_names:
+            # First versioned build on a pre-upgrade deployment: the unversioned
+            # collection named after the alias is what was being served
+            old = alias
+        if old == name:
+            return
+        if old:
+            entry["previous"] = old
+            entry.setdefault("retired", {})[old] = time.time()
+        entry.get("retired", {}).pop(name, None)
+        entry["active"] = name
+        entry["activated_at"] = time.time()
+
+    def activate(self, alias: str, name: str, tenant: Optional[Dict[str, Any]] = None,
+                 existing_names: Iterable[str] = ()):
+        self._update(lambda data: self._activate(data, alias, name, tenant, existing_names))
+
+    def rollback(self, alias: str = DEFAULT_ALIAS) -> str:
+        def change(data: Dict[str, Any]) -> str:
+            entry = data.get("aliases", {}).get(alias)
+            if not entry or not entry.get("previous"):
+                raise ValueError(f"No previous version to roll back to for '{alias}'")
+            previous = entry["previous"]
+            self._activate(data, alias, previous)
+            return previous
+
+        return self._update(change)
+
+    def expired_versions(self, alias: str, retention_hours: float) -> List[str]:
+        entry = self.get_alias(alias) or {}
+        cutoff = time.time() - retention_hours * 3600
+        return [
+            name for name, retired_at in entry.get("retired", {}).items()
+            if retired_at <= cutoff and name not in (entry.get("active"), entry.get("previous"))
+        ]
+
+    def forget(self, alias: str, name: str):
+        def change(data: Dict[str, Any]):
+            entry = self._entry(data, alias)
+            if name == entry.get("active"):
+                raise ValueError(f"Cannot forget the active version '{name}'")
+            entry.get("retired", {}).pop(name, None)
+            if entry.get("previous") == name:
+                entry["previous"] = None
+
+        self._update(change)
+
+
+def collect_garbage(client, registry: CollectionRegistry, alias: str = DEFAULT_ALIAS,
+                    retention_hours: Optional[float] = None) -> List[str]:
+    """Drop retired versions older than the grace period (the previous version is kept for rollback)."""
+    if retention_hours is None:
+        retention_hours = settings.COLLECTION_RETENTION_HOURS
+
+    existing = {c.name for c in client.list_collections()}
+    deleted = []
+    for name in registry.expired_versions(alias, retention_hours):
+        if name in existing:
+            client.delete_collection(name)
+        shutil.rmtree(registry.path.parent / "local_index" / name, ignore_errors=True)
+        (registry.path.parent / "doc_store" / f"{name}.sqlite3").unlink(missing_ok=True)
+        registry.forget(alias, name)
+        deleted.append(name)
+    return deleted
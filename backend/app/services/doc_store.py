@@ -0,0 +1,120 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+import zstandard
+
+DOC_STORE_DIR = "doc_store"
+
+# Chunks are a few hundred characters each, too short to compress well on their own,
+# so a shared dictionary is trained from a sample of the corpus at build time.
+COMPRESSION_LEVEL = 9
+DICTIONARY_SIZE = 112 * 1024
+DICTIONARY_MIN_SAMPLES = 1000
+DICTIONARY_MAX_SAMPLES = 20000
+
+# SQLite's default limit on bound parameters is 999
+_FETCH_BATCH = 500
+
+
+def store_path(persist_directory: str, collection_name: str) -> Path:
+    return Path(persist_directory) / DOC_STORE_DIR / f"{collection_name}.sqlite3"
+
+
+def content_hash(document: str) -> str:
+    return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+
+class DocumentStore:
+    """
+    Chunk bodies for one collection version, zstd-compressed and keyed by content hash.
+
+    The vector search only returns ids and distances; the texts (and metadata) of the
+    final top-k are then fetched here in one bulk read, so chunk bodies are not kept
+    in Chroma and identical chunks are stored once.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'dictionary'").fetchone()
+        self._dictionary = zstandard.ZstdCompressionDict(row[0]) if row else None
+
+    @classmethod
+    def build(
+        cls,
+        path: Path,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        level: int = COMPRESSION_LEVEL
+    ) -> "DocumentStore":
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.unlink(missing_ok=True)
+
+        dictionary = None
+        if len(documents) >= DICTIONARY_MIN_SAMPLES:
+            step = max(1, len(documents) // DICTIONARY_MAX_SAMPLES)
+            samples = [doc.encode("utf-8") for doc in documents[::step]]
+            dictionary = zstandard.train_dictionary(DICTIONARY_SIZE, samples, level=level)
+        compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+
+        conn = sqlite3.connect(path)
+        try:
+            conn.executescript("""
+                CREATE TABLE meta (key TEXT PRIMARY KEY, value BLOB) WITHOUT ROWID;
+                CREATE TABLE blobs (hash TEXT PRIMARY KEY, body BLOB NOT NULL) WITHOUT ROWID;
+                CREATE TABLE documents (
+                    id TEXT PRIMARY KEY, hash TEXT NOT NULL, metadata TEXT NOT NULL
+                ) WITHOUT ROWID;
+            """)
+            if dictionary is not None:
+                conn.execute("INSERT INTO meta VALUES ('dictionary', ?)", (dictionary.as_bytes(),))
+
+            blobs = {}
+            rows = []
+            for doc_id, document, metadata in zip(ids, documents, metadatas):
+                digest = content_hash(document)
+                if digest not in blobs:
+                    blobs[digest] = compressor.compress(document.encode("utf-8"))
+                rows.append((doc_id, digest, json.dumps(metadata, ensure_ascii=False)))
+            conn.executemany("INSERT INTO blobs VALUES (?, ?)", blobs.items())
+            conn.executemany("INSERT INTO documents VALUES (?, ?, ?)", rows)
+            conn.commit()
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        return cls(path)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def get(self, ids: List[str]) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        """Return {id: (document, metadata)} for the ids that exist in the store."""
+        unique_ids = list(dict.fromkeys(ids))
+        rows = []
+        with self._lock:
+            for start in range(0, len(unique_ids), _FETCH_BATCH):
+                batch = unique_ids[start:start + _FETCH_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows.extend(self._conn.execute(
+                    "SELECT d.id, d.metadata, b.body FROM documents d JOIN blobs b ON b.hash = d.hash "
+                    f"WHERE d.id IN ({placeholders})",
+                    batch
+                ).fetchall())
+
+        # Decompressors are not thread-safe, so each bulk fetch uses its own
+        decompressor = zstandard.ZstdDecompressor(dict_data=self._dictionary)
+        return {
+            doc_id: (decompressor.decompress(body).decode("utf-8"), json.loads(metadata))
+            for doc_id, metadata, body in rows
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,186 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+QUANTIZATIONS = ("none", "int8", "binary")
+LOCAL_INDEX_DIR = "local_index"
+
+# Number of set bits for every byte value, used for Hamming distance on packed codes
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# Codes are quantized and scored in row blocks so temporaries stay this small
+# (and cache-resident) instead of growing to the size of the float matrix
+_SCORE_BLOCK_BYTES = 4 * 1024 * 1024
+
+
+def index_path(persist_directory: str, collection_name: str) -> Path:
+    return Path(persist_directory) / LOCAL_INDEX_DIR / collection_name
+
+
+def index_exists(path: Path) -> bool:
+    return (path / "vectors.npy").is_file() and (path / "meta.json").is_file()
+
+
+def normalize(vectors: np.ndarray, dimensions: Optional[int] = None) -> np.ndarray:
+    """Truncate to the first `dimensions` components (Matryoshka-style) and L2-normalize."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dimensions:
+        vectors = vectors[..., :dimensions]
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class LocalVectorIndex:
+    """
+    In-process cosine index with optional int8 or binary codes.
+
+    Quantized codes are scanned to pick `n_results * oversample` candidates,
+    which are then re-scored against the float vectors. When loaded from disk
+    the float vectors are memory-mapped, so only candidate rows are paged in.
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        vectors: np.ndarray,
+        metadatas: List[Dict[str, Any]],
+        documents: Optional[List[str]] = None,
+        quantization: str = "none",
+        oversample: int = 4
+    ):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization '{quantization}', expected one of {QUANTIZATIONS}")
+
+        self.ids = list(ids)
+        self.vectors = vectors
+        self.metadatas = metadatas
+        self.documents = documents
+        self.quantization = quantization
+        self.oversample = max(1, oversample)
+        self.dimensions = vectors.shape[1]
+        self._filters: Dict[Tuple[str, Any], np.ndarray] = {}
+
+        self._scale = None
+        self._codes = None
+        # Quantized in row blocks too, so loading a memory-mapped index never holds a float copy
+        block = max(1, _SCORE_BLOCK_BYTES // (self.dimensions * 4))
+        if quantization == "int8":
+            peak = np.zeros(self.dimensions, dtype=np.float32)
+            for start in range(0, len(vectors), block):
+                np.maximum(peak, np.abs(vectors[start:start + block]).max(axis=0), out=peak)
+            self._scale = np.maximum(peak, 1e-12) / 127.0
+            self._codes = np.empty(vectors.shape, dtype=np.int8)
+            for start in range(0, len(vectors), block):
+                self._codes[start:start + block] = np.round(vectors[start:start + block] / self._scale)
+        elif quantization == "binary":
+            self._codes = np.empty((len(vectors), (self.dimensions + 7) // 8), dtype=np.uint8)
+            for start in range(0, len(vectors), block):
+                self._codes[start:start + block] = np.packbits(vectors[start:start + block] > 0, axis=1)
+
+    @property
+    def memory_bytes(self) -> int:
+        # Bytes that must stay resident; memory-mapped float vectors are only paged in for re-scoring
+        if self._codes is None:
+            return self.vectors.nbytes
+        extra = self._scale.nbytes if self._scale is not None else 0
+        return self._codes.nbytes + extra
+
+    def save(self, path: Path):
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / "vectors.npy", np.ascontiguousarray(self.vectors, dtype=np.float32))
+        with open(path / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(
+                {"ids": self.ids, "metadatas": self.metadatas, "documents": self.documents},
+                f,
+                ensure_ascii=False
+            )
+
+    @classmethod
+    def load(cls, path: Path, quantization: str = "none", oversample: int = 4) -> "LocalVectorIndex":
+        vectors = np.load(path / "vectors.npy", mmap_mode="r")
+        with open(path / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(
+            ids=meta["ids"],
+            vectors=vectors,
+            metadatas=meta["metadatas"],
+            documents=meta.get("documents"),
+            quantization=quantization,
+            oversample=oversample
+        )
+
+    def _candidates(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        if not where:
+            return None
+        mask = None
+        for key, value in where.items():
+            if (key, value) not in self._filters:
+                self._filters[(key, value)] = np.array(
+                    [i for i, m in enumerate(self.metadatas) if m.get(key) == value], dtype=np.int64
+                )
+            rows = self._filters[(key, value)]
+            mask = rows if mask is None else np.intersect1d(mask, rows, assume_unique=True)
+        return mask
+
+    def _coarse_scores(self, query: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        if self.quantization == "none":
+            vectors = self.vectors if rows is None else self.vectors[rows]
+            return np.asarray(vectors) @ query
+
+        total = len(self._codes) if rows is None else len(rows)
+        scores = np.empty(total, dtype=np.float32)
+        block = max(1, _SCORE_BLOCK_BYTES // self._codes.shape[1])
+        if self.quantization == "int8":
+            scaled_query = (query * self._scale).astype(np.float32)
+        else:
+            query_bits = np.packbits(query > 0)
+
+        for start in range(0, total, block):
+            end = min(start + block, total)
+            codes = self._codes[start:end] if rows is None else self._codes[rows[start:end]]
+            if self.quantization == "int8":
+                # einsum casts int8 -> float32 through its small internal buffer, never a full copy
+                np.einsum("ij,j->i", codes, scaled_query, dtype=np.float32, casting="unsafe",
+                          out=scores[start:end])
+            else:
+                scores[start:end] = -_POPCOUNT[np.bitwise_xor(codes, query_bits)].sum(axis=1, dtype=np.int32)
+        return scores
+
+    def search(self, query: np.ndarray, n_results: int,
+               where: Optional[Dict[str, Any]] = None) -> Tuple[List[int], List[float]]:
+        rows = self._candidates(where)
+        total = len(self.ids) if rows is None else len(rows)
+        if total == 0:
+            return [], []
+
+        scores = self._coarse_scores(query, rows)
+        k = min(n_results, total)
+        if self.quantization != "none":
+            k = min(n_results * self.oversample, total)
+        top = np.argpartition(-scores, k - 1)[:k]
+        if rows is not None:
+            top = rows[top]
+
+        # Float re-score of the shortlisted candidates
+        top = np.sort(top)
+        exact = np.asarray(self.vectors[top]) @ query
+        order = np.argsort(-exact)[:n_results]
+        # Squared L2 between unit vectors, matching Chroma's default "l2" space
+        return top[order].tolist(), (2.0 - 2.0 * exact[order]).tolist()
+
+    def query(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        queries = normalize(query_embeddings, self.dimensions)
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for query in queries:
+            rows, distances = self.search(query, n_results, where)
+            results["ids"].append([self.ids[i] for i in rows])
+            results["documents"].append([self.documents[i] for i in rows] if self.documents else [])
+            results["metadatas"].append([self.metadatas[i] for i in rows])
+            results["distances"].append(distances)
+        return results
@@ -0,0 +1,70 @@
+import re
+import unicodedata
+from typing import List, Optional, Sequence
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.models.precomputed_answer import PrecomputedAnswer
+
+settings = get_settings()
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Collapse spelling-insensitive differences so identical question shapes are embedded once."""
+    question = unicodedata.normalize("NFKC", question).lower()
+    question = _PUNCTUATION.sub(" ", question)
+    return _WHITESPACE.sub(" ", question).strip()
+
+
+def centroid_to_blob(vector: Sequence[float]) -> bytes:
+    import numpy as np
+
+    vector = np.asarray(vector, dtype=np.float32)
+    return (vector / max(float(np.linalg.norm(vector)), 1e-12)).tobytes()
+
+
+def blob_to_centroid(blob: bytes):
+    import numpy as np
+
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+def find_precomputed_answer(
+    db: Session,
+    subject: str,
+    query_embedding: List[float],
+    corpus_version: str,
+    threshold: Optional[float] = None
+) -> Optional[str]:
+    """
+    Answer of the subject's question cluster nearest to the query embedding,
+    if its cosine similarity reaches the threshold.
+    """
+    import numpy as np
+
+    if threshold is None:
+        threshold = settings.PRECOMPUTED_MATCH_THRESHOLD
+
+    # Entries built from an older collection version never match, so a rebuild invalidates them
+    rows = db.query(PrecomputedAnswer.id, PrecomputedAnswer.centroid).filter(
+        PrecomputedAnswer.subject == subject,
+        PrecomputedAnswer.corpus_version == corpus_version
+    ).all()
+
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query /= max(float(np.linalg.norm(query)), 1e-12)
+    best_id, best_score = None, threshold
+    for row_id, blob in rows:
+        centroid = blob_to_centroid(blob)
+        if centroid.shape != query.shape:
+            continue
+        score = float(centroid @ query)
+        if score >= best_score:
+            best_id, best_score = row_id, score
+    if best_id is None:
+        return None
+
+    row = db.query(PrecomputedAnswer.answer).filter(PrecomputedAnswer.id == best_id).first()
+    return row.answer if row else None
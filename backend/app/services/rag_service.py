@@ -1,42 +1,78 @@
-from openai import OpenAI
 from typing import List, Optional
 from app.config import get_settings
 from app.services.vectordb import VectorDBService
+from app.utils.profiling import run_in_thread, trace_record, trace_stage
 
 settings = get_settings()
 
 
 class RAGService:
     def __init__(self):
+        # Imported on first use to keep app startup light
+        from openai import OpenAI
+
         self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
         self.vectordb = VectorDBService()
         self.embedding_model = "text-embedding-3-small"
         self.chat_model = "gpt-4o-mini"
 
-    def get_embedding(self, text: str) -> List[float]:
-        response = self.client.embeddings.create(
-            model=self.embedding_model,
-            input=text
-        )
+    def get_embedding(self, text: str, aliases: Optional[List[str]] = None) -> List[float]:
+        params = {"model": self.embedding_model, "input": text}
+        dimensions = self.vectordb.embedding_dimensions(aliases)
+        if dimensions:
+            params["dimensions"] = dimensions
+
+        with trace_stage("embedding"):
+            response = self.client.embeddings.create(**params)
+        trace_record(embedding_tokens=response.usage.total_tokens)
         return response.data[0].embedding
 
+    def get_embeddings(self, texts: List[str], aliases: Optional[List[str]] = None,
+                       batch_size: int = 100) -> List[List[float]]:
+        params = {"model": self.embedding_model}
+        dimensions = self.vectordb.embedding_dimensions(aliases)
+        if dimensions:
+            params["dimensions"] = dimensions
+
+        embeddings = []
+        for i in range(0, len(texts), batch_size):
+            response = self.client.embeddings.create(input=texts[i:i + batch_size], **params)
+            embeddings.extend(item.embedding for item in response.data)
+        return embeddings
+
+    @staticmethod
+    def question_text(subject: str, question: str) -> str:
+        # Text embedded for retrieval, and for matching precomputed question clusters
+        return f"{subject} {question}"
+
+    def embed_question(self, subject: str, question: str, aliases: Optional[List[str]] = None) -> List[float]:
+        return self.get_embedding(self.question_text(subject, question), aliases)
+
     def search_similar_documents(
         self,
         query: str,
         subject: Optional[str] = None,
-        n_results: int = 5
+        n_results: int = 5,
+        aliases: Optional[List[str]] = None,
+        query_embedding: Optional[List[float]] = None
     ) -> List[dict]:
-        query_embedding = self.get_embedding(query)
+        if aliases is not None and not aliases:
+            return []
+
+        if query_embedding is None:
+            query_embedding = self.get_embedding(query, aliases)
 
         where_filter = None
         if subject:
             where_filter = {"subject": subject}
 
-        results = self.vectordb.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results,
-            where=where_filter
-        )
+        with trace_stage("vector_search"):
+            results = self.vectordb.query(
+                query_embeddings=[query_embedding],
+                n_results=n_results,
+                where=where_filter,
+                aliases=aliases
+            )
 
         documents = []
         if results and results.get("documents") and results["documents"][0]:
@@ -49,14 +85,47 @@ class RAGService:
                     "distance": distance
                 })
 
+        trace_record(retrieval={
+            "partitions": 1 if aliases is None else len(aliases),
+            "requested": n_results,
+            "returned": len(documents),
+            "distances": [round(doc["distance"], 4) for doc in documents]
+        })
         return documents
 
-    async def get_answer(self, subject: str, question: str) -> str:
+    def retrieve(
+        self,
+        subject: str,
+        question: str,
+        university: Optional[str] = None,
+        department: Optional[str] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[dict]:
+        # Route to the requested university/department partitions
+        with trace_stage("route"):
+            aliases = self.vectordb.route(university, department, subject)
+
         # Search for similar documents
-        similar_docs = self.search_similar_documents(
-            query=f"{subject} {question}",
+        return self.search_similar_documents(
+            query=self.question_text(subject, question),
             subject=subject,
-            n_results=5
+            n_results=5,
+            aliases=aliases,
+            query_embedding=query_embedding
+        )
+
+    async def get_answer(
+        self,
+        subject: str,
+        question: str,
+        university: Optional[str] = None,
+        department: Optional[str] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> str:
+        # Retrieval and the completion block on Chroma and OpenAI, so they run in worker
+        # threads and leave the event loop free for other requests
+        similar_docs = await run_in_thread(
+            self.retrieve, subject, question, university, department, query_embedding
         )
 
         # Build context from retrieved documents
@@ -90,14 +159,21 @@ class RAGService:
 위 참고자료를 바탕으로 학생의 질문에 답변해주세요."""
 
         # Call OpenAI API
-        response = self.client.chat.completions.create(
-            model=self.chat_model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.7,
-            max_tokens=2000
+        with trace_stage("completion"):
+            response = await run_in_thread(
+                self.client.chat.completions.create,
+                model=self.chat_model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=0.7,
+                max_tokens=2000
+            )
+        trace_record(
+            context_chars=len(context),
+            prompt_tokens=response.usage.prompt_tokens,
+            completion_tokens=response.usage.completion_tokens
         )
 
         return response.choices[0].message.content
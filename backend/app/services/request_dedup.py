@@ -0,0 +1,79 @@
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.models.idempotency_key import IdempotencyKey
+
+settings = get_settings()
+
+
+class IdempotencyKeyMismatch(Exception):
+    pass
+
+
+def request_fingerprint(**fields: Any) -> str:
+    payload = json.dumps(fields, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Identical calls that arrive while one is running await the same result instead of repeating it."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            # Its own task, so cancelling the first caller (e.g. a client disconnect)
+            # doesn't cancel the call for everyone who joined it
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark as retrieved when every caller was cancelled before it finished
+            task.exception()
+
+
+def purge_expired(db: Session) -> int:
+    """Delete keys past the TTL; find_replay only drops a key when the same key comes back."""
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+    deleted = db.query(IdempotencyKey).filter(
+        IdempotencyKey.created_at < cutoff
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def find_replay(db: Session, key: str, fingerprint: str) -> Optional[int]:
+    """Return the stored chat_history id for a key seen within the TTL."""
+    record = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+    if record is None:
+        return None
+
+    if record.created_at < datetime.utcnow() - timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS):
+        db.delete(record)
+        db.commit()
+        return None
+
+    if record.request_hash != fingerprint:
+        raise IdempotencyKeyMismatch(key)
+    return record.chat_history_id
+
+
+def remember(db: Session, key: str, fingerprint: str, chat_history_id: int):
+    db.add(IdempotencyKey(key=key, request_hash=fingerprint, chat_history_id=chat_history_id))
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent retry with the same key already stored it
+        db.rollback()
@@ -0,0 +1,151 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+import numpy as np
+
+
+Partition = Tuple[List[str], np.ndarray]
+
+
+class PartitionCache:
+    """
+    Process-wide LRU of subject vectors, keyed by (collection name, subject).
+
+    One byte budget covers every collection version, so memory does not grow with
+    the number of tenants. The partition just stored is always kept, even when it
+    alone exceeds the budget.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[Tuple[str, str], Partition]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[Partition]:
+        with self._lock:
+            partition = self._entries.get(key)
+            if partition is not None:
+                self._entries.move_to_end(key)
+            return partition
+
+    def put(self, key: Tuple[str, str], partition: Partition) -> Partition:
+        with self._lock:
+            if key in self._entries:
+                # Loaded concurrently by another query
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self._entries[key] = partition
+            self.bytes += partition[1].nbytes
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted.nbytes
+            return partition
+
+    def retain(self, collection_names: Set[str]):
+        """Release the partitions of every collection not in `collection_names`."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] not in collection_names]:
+                self.bytes -= self._entries.pop(key)[1].nbytes
+
+
+class SubjectIndex:
+    """
+    subject -> document-id index for one (immutable) collection version.
+
+    A subject filter on Chroma looks the subject up in its metadata store and then
+    runs a filtered HNSW search, which is slower than a brute-force scan of the
+    subject's own vectors at every partition size measured (scripts/benchmark_prefilter.py)
+    and loses recall at Chroma's default search_ef. Partitions up to `max_exact`
+    documents are therefore searched exactly over their own vectors, which are
+    kept in the shared `cache` after the first query; larger ones still go to the ANN.
+    """
+
+    def __init__(self, collection, cache: PartitionCache, max_exact: int = 20000):
+        self.collection = collection
+        self.cache = cache
+        self.max_exact = max_exact
+        self._counts: Optional[Dict[str, int]] = None
+        self._retired = False
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        if self._counts is None:
+            stored = (self.collection.metadata or {}).get("subject_counts")
+            if stored:
+                self._counts = json.loads(stored)
+            else:
+                # Collections built before subject_counts was recorded: count once from metadata
+                counts: Dict[str, int] = {}
+                for metadata in self.collection.get(include=["metadatas"])["metadatas"]:
+                    subject = (metadata or {}).get("subject")
+                    counts[subject] = counts.get(subject, 0) + 1
+                self._counts = counts
+        return self._counts
+
+    def use_exact(self, subject: str) -> bool:
+        return self.counts.get(subject, 0) <= self.max_exact
+
+    def retire(self):
+        """Stop caching: queries still running on a swapped-out version load without storing."""
+        self._retired = True
+
+    def _partition(self, subject: str) -> Partition:
+        key = (self.collection.name, subject)
+        partition = self.cache.get(key)
+        if partition is not None:
+            return partition
+
+        if not self.counts.get(subject):
+            return [], np.empty((0, 0), dtype=np.float32)
+
+        data = self.collection.get(where={"subject": subject}, include=["embeddings"])
+        partition = (data["ids"], np.asarray(data["embeddings"], dtype=np.float32))
+        if self._retired:
+            return partition
+        return self.cache.put(key, partition)
+
+    def query(
+        self,
+        query_embeddings: List[List[float]],
+        subject: str,
+        n_results: int,
+        include: List[str]
+    ) -> Dict[str, Any]:
+        ids, vectors = self._partition(subject)
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        results: Dict[str, Any] = {"ids": [], "distances": [], "documents": [], "metadatas": []}
+        if not ids:
+            for _ in queries:
+                for key in results:
+                    results[key].append([])
+            return results
+
+        # Squared L2, the same distance Chroma reports for its default "l2" space
+        distances = (
+            (queries ** 2).sum(axis=1, keepdims=True)
+            - 2.0 * queries @ vectors.T
+            + (vectors ** 2).sum(axis=1)
+        )
+        k = min(n_results, len(ids))
+        top_rows = []
+        for row in distances:
+            top = np.argpartition(row, k - 1)[:k]
+            top_rows.append(top[np.argsort(row[top])])
+
+        wanted = [i for i in include if i in ("documents", "metadatas")]
+        fetched: Dict[str, Dict[str, Any]] = {}
+        if wanted:
+            hit_ids = sorted({ids[i] for top in top_rows for i in top})
+            data = self.collection.get(ids=hit_ids, include=wanted)
+            for key in wanted:
+                fetched[key] = dict(zip(data["ids"], data[key]))
+
+        for row, top in zip(distances, top_rows):
+            top_ids = [ids[i] for i in top]
+            results["ids"].append(top_ids)
+            results["distances"].append([float(max(row[i], 0.0)) for i in top])
+            for key in ("documents", "metadatas"):
+                results[key].append([fetched[key][doc_id] for doc_id in top_ids] if key in fetched else [])
+        return results
@@ -1,15 +1,39 @@
-import chromadb
-from chromadb.config import Settings
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from app.config import get_settings
+from app.services.collection_registry import (
+    CollectionRegistry,
+    DEFAULT_ALIAS,
+    DEFAULT_DEPARTMENT,
+    DEFAULT_UNIVERSITY
+)
+from app.utils.profiling import trace_stage
 
 settings = get_settings()
 
+# Shared pool for fanning a query out to several tenant partitions
+_query_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="vectordb-query")
+
+
+class UnknownTarget(ValueError):
+    """A university/department was requested that matches no ingested corpus."""
+
+    def __init__(self, university: Optional[str], department: Optional[str], available: List[Dict[str, str]]):
+        self.university = university
+        self.department = department
+        self.available = available
+        super().__init__(f"No corpus for university={university!r}, department={department!r}")
+
 
 class VectorDBService:
     _instance = None
     _client = None
-    _collection = None
+    _collections = None
+    _registry = None
+    _local_indexes = None
+    _subject_indexes = None
+    _doc_stores = None
+    _partition_cache = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -18,62 +42,266 @@ class VectorDBService:
 
     def __init__(self):
         if self._client is None:
+            # chromadb (and its dependency tree) is imported on first use, not at app import
+            import chromadb
+            from chromadb.config import Settings
+            from app.services.subject_index import PartitionCache
+
             self._client = chromadb.PersistentClient(
                 path=settings.CHROMA_PERSIST_DIRECTORY,
                 settings=Settings(anonymized_telemetry=False)
             )
-            self._collection = self._client.get_or_create_collection(
-                name="setuek_collection",
+            self._registry = CollectionRegistry()
+            self._collections = {}
+            self._local_indexes = {}
+            self._subject_indexes = {}
+            self._doc_stores = {}
+            # One budget for the exact-search vectors of every tenant and version
+            self._partition_cache = PartitionCache(settings.PREFILTER_CACHE_MB * 2**20)
+
+    def get_collection(self, alias: str = DEFAULT_ALIAS):
+        # Follow the alias pointer so a re-ingestion swap is picked up without a restart
+        name = self._registry.get_active(alias)
+        cached = self._collections.get(alias)
+        if cached is not None and cached.name == (name or alias):
+            return cached
+
+        if name is None:
+            if alias != DEFAULT_ALIAS:
+                raise ValueError(f"Unknown collection alias '{alias}'")
+            collection = self._client.get_or_create_collection(
+                name=DEFAULT_ALIAS,
                 metadata={"description": "세부능력특기사항 데이터"}
             )
+        else:
+            collection = self._client.get_collection(name=name)
+        self._collections[alias] = collection
+        if cached is not None:
+            self._prune_version_caches()
+        return collection
+
+    def _prune_version_caches(self):
+        # Per-version state (loaded local indexes, open doc stores, subject indexes) is only kept for
+        # collections some alias still points at. Entries are dropped rather than closed, so a query
+        # still holding the old version finishes normally and the handles are released afterwards.
+        live = {c.name for c in self._collections.values()}
+        self._local_indexes = {name: idx for name, idx in self._local_indexes.items() if name in live}
+        self._doc_stores = {name: store for name, store in self._doc_stores.items() if name in live}
+        for name, idx in self._subject_indexes.items():
+            if name not in live:
+                idx.retire()
+        self._subject_indexes = {name: idx for name, idx in self._subject_indexes.items() if name in live}
+        self._partition_cache.retain(live)
 
     @property
     def collection(self):
-        return self._collection
+        return self.get_collection(DEFAULT_ALIAS)
+
+    def list_tenants(self) -> List[Dict[str, Any]]:
+        tenants = []
+        for alias, entry in self._registry.list_aliases().items():
+            if entry.get("active") and entry.get("tenant"):
+                tenants.append({"alias": alias, **entry["tenant"]})
+        return tenants
 
-    def add_documents(
+    def route(
         self,
-        documents: List[str],
-        metadatas: List[Dict[str, Any]],
-        ids: List[str],
-        embeddings: Optional[List[List[float]]] = None
-    ):
-        if embeddings:
-            self._collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                ids=ids,
-                embeddings=embeddings
+        university: Optional[str] = None,
+        department: Optional[str] = None,
+        subject: Optional[str] = None
+    ) -> List[str]:
+        """Pick the partitions a query should search; untargeted queries keep using the default corpus."""
+        if not university and not department:
+            return [DEFAULT_ALIAS]
+
+        tenants = self.list_tenants()
+        matched = [
+            tenant for tenant in tenants
+            if (not university or tenant.get("university") == university)
+            and (not department or tenant.get("department") == department)
+        ]
+        if not matched and university in (None, DEFAULT_UNIVERSITY) and department in (None, DEFAULT_DEPARTMENT):
+            # The original corpus, ingested before tenants were recorded in the registry
+            return [DEFAULT_ALIAS]
+        if not matched:
+            # A typo or a corpus that was never ingested; searching nothing would give an ungrounded answer
+            available = sorted({(t["university"], t["department"]) for t in tenants})
+            raise UnknownTarget(university, department, [
+                {"university": u, "department": d} for u, d in available
+            ])
+
+        return [
+            tenant["alias"] for tenant in matched
+            if not (subject and tenant.get("subjects") and subject not in tenant["subjects"])
+        ]
+
+    def corpus_version(self, aliases: Optional[List[str]] = None) -> str:
+        # Active collection names change on every rebuild, so they double as a corpus version
+        if aliases is None:
+            aliases = [DEFAULT_ALIAS]
+        return ",".join(sorted(self.get_collection(alias).name for alias in aliases))
+
+    def embedding_dimensions(self, aliases: Optional[List[str]] = None) -> Optional[int]:
+        # Shortened (Matryoshka) embeddings are recorded on the collection at ingestion time.
+        # Query with the largest size in use; smaller partitions get a truncated copy.
+        dimensions = []
+        for alias in aliases or [DEFAULT_ALIAS]:
+            size = (self.get_collection(alias).metadata or {}).get("embedding_dimensions")
+            if not size:
+                return None
+            dimensions.append(size)
+        return max(dimensions) if dimensions else None
+
+    def _get_local_index(self, name: str):
+        from app.services.local_index import LocalVectorIndex, index_exists, index_path
+
+        index = self._local_indexes.get(name)
+        if index is None:
+            path = index_path(settings.CHROMA_PERSIST_DIRECTORY, name)
+            if not index_exists(path):
+                # Built without a local index (or the unversioned legacy collection)
+                return None
+            index = LocalVectorIndex.load(
+                path,
+                quantization=settings.EMBEDDING_QUANTIZATION,
+                oversample=settings.RESCORE_OVERSAMPLE
             )
-        else:
-            self._collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                ids=ids
+            self._local_indexes[name] = index
+        return index
+
+    def _get_subject_index(self, collection):
+        from app.services.subject_index import SubjectIndex
+
+        index = self._subject_indexes.get(collection.name)
+        if index is None:
+            index = SubjectIndex(
+                collection,
+                self._partition_cache,
+                max_exact=settings.EXACT_SEARCH_MAX_PARTITION
             )
+            self._subject_indexes[collection.name] = index
+        return index
 
-    def query(
+    def _get_doc_store(self, collection):
+        # Collections ingested before the side store existed keep their bodies in Chroma
+        if not (collection.metadata or {}).get("document_store"):
+            return None
+
+        from app.services.doc_store import DocumentStore, store_path
+
+        doc_store = self._doc_stores.get(collection.name)
+        if doc_store is None:
+            doc_store = DocumentStore(store_path(settings.CHROMA_PERSIST_DIRECTORY, collection.name))
+            self._doc_stores[collection.name] = doc_store
+        return doc_store
+
+    def _query_partition(
         self,
+        alias: str,
         query_embeddings: List[List[float]],
-        n_results: int = 5,
-        where: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
+        n_results: int,
+        where: Optional[Dict[str, Any]]
+    ) -> Tuple[str, Any, Dict[str, Any]]:
+        """Search one partition; returns (collection name, document store or None, Chroma-shaped results)."""
+        collection = self.get_collection(alias)
+        dimensions = (collection.metadata or {}).get("embedding_dimensions")
+        if dimensions and len(query_embeddings[0]) > dimensions:
+            from app.services.local_index import normalize
+
+            query_embeddings = normalize(query_embeddings, dimensions).tolist()
+
+        doc_store = self._get_doc_store(collection)
+        if settings.VECTOR_INDEX_BACKEND == "local":
+            local_index = self._get_local_index(collection.name)
+            if local_index is not None:
+                return collection.name, doc_store, local_index.query(query_embeddings, n_results, where)
+            # Versions without a local index are still served, through Chroma
+
+        # With a side store only ids and distances come back; bodies are fetched after the merge
+        include = ["distances"] if doc_store else ["documents", "metadatas", "distances"]
+
+        # Small subject partitions are searched exactly over their own vectors
+        if where and list(where) == ["subject"]:
+            subject_index = self._get_subject_index(collection)
+            if subject_index.use_exact(where["subject"]):
+                return collection.name, doc_store, subject_index.query(
+                    query_embeddings, where["subject"], n_results, include
+                )
+
         params = {
             "query_embeddings": query_embeddings,
             "n_results": n_results,
-            "include": ["documents", "metadatas", "distances"]
+            "include": include
         }
         if where:
             params["where"] = where
 
-        return self._collection.query(**params)
+        return collection.name, doc_store, collection.query(**params)
+
+    def query(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        aliases: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Search the given partitions and merge the hits by distance.
+
+        Every tenant's ids start at doc_0, so merged ids are qualified as
+        "<collection name>/<id>" (collection names never contain "/").
+        """
+        if aliases is None:
+            aliases = [DEFAULT_ALIAS]
+        merged = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if not aliases:
+            return merged
+
+        # Partitions are searched in parallel, then merged by distance
+        if len(aliases) == 1:
+            partials = [self._query_partition(aliases[0], query_embeddings, n_results, where)]
+        else:
+            partials = list(_query_pool.map(
+                lambda alias: self._query_partition(alias, query_embeddings, n_results, where),
+                aliases
+            ))
+        for q in range(len(query_embeddings)):
+            hits = []
+            for collection_name, doc_store, partial in partials:
+                documents = (partial.get("documents") or [[]] * len(query_embeddings))[q]
+                metadatas = (partial.get("metadatas") or [[]] * len(query_embeddings))[q]
+                for i, doc_id in enumerate(partial["ids"][q]):
+                    hits.append([
+                        partial["distances"][q][i],
+                        doc_id,
+                        documents[i] if documents else None,
+                        metadatas[i] if metadatas else {},
+                        doc_store,
+                        collection_name
+                    ])
+            hits.sort(key=lambda hit: hit[0])
+            hits = hits[:n_results]
+            self._fetch_documents(hits)
+            merged["distances"].append([hit[0] for hit in hits])
+            merged["ids"].append([f"{hit[5]}/{hit[1]}" for hit in hits])
+            merged["documents"].append([hit[2] for hit in hits])
+            merged["metadatas"].append([hit[3] for hit in hits])
+        return merged
 
-    def get_collection_count(self) -> int:
-        return self._collection.count()
+    @staticmethod
+    def _fetch_documents(hits: List[list]):
+        # Only the final top-k bodies are read, one bulk fetch per side store
+        by_store: Dict[Any, List[list]] = {}
+        for hit in hits:
+            if hit[2] is None and hit[4] is not None:
+                by_store.setdefault(hit[4], []).append(hit)
+        for doc_store, store_hits in by_store.items():
+            with trace_stage("document_fetch"):
+                fetched = doc_store.get([hit[1] for hit in store_hits])
+            for hit in store_hits:
+                document, metadata = fetched.get(hit[1], (None, {}))
+                hit[2] = document
+                hit[3] = hit[3] or metadata
 
-    def delete_collection(self):
-        self._client.delete_collection("setuek_collection")
-        self._collection = self._client.get_or_create_collection(
-            name="setuek_collection",
-            metadata={"description": "세부능력특기사항 데이터"}
-        )
+    def get_collection_count(self, alias: str = DEFAULT_ALIAS) -> int:
+        return self.get_collection(alias).count()
@@ -0,0 +1,370 @@
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# Only API requests are profiled; the admin endpoints that read profiles are not
+PROFILED_PREFIX = "/api/"
+EXCLUDED_PREFIX = "/api/admin"
+
+
+class RequestTrace:
+    """Stage timings and counters collected while one request is handled."""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.stats: Dict[str, Any] = {}
+        self.db = {"queries": 0, "ms": 0.0}
+        # Worker threads currently running this request's run_in_thread calls
+        self.threads: Set[int] = set()
+
+    def add_stage(self, name: str, ms: float):
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stages_ms": {name: round(ms, 2) for name, ms in self.stages.items()},
+            "db": {"queries": self.db["queries"], "ms": round(self.db["ms"], 2)},
+            **self.stats
+        }
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+@contextmanager
+def trace_stage(name: str):
+    """Time a block as a named stage of the current request (no-op outside a profiled request)."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_stage(name, (time.perf_counter() - start) * 1000)
+
+
+def trace_record(**stats: Any):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.stats.update(stats)
+
+
+def install_db_hooks(engine):
+    """Count queries and time spent in the database per request."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current_trace.get() is not None:
+            conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        trace = _current_trace.get()
+        starts = conn.info.get("profile_query_start")
+        if trace is not None and starts:
+            trace.db["queries"] += 1
+            trace.db["ms"] += (time.perf_counter() - starts.pop()) * 1000
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _Profile:
+    def __init__(self, task: asyncio.Task, thread_id: int, trace: Optional[RequestTrace], due: float):
+        self.task = task
+        self.thread_id = thread_id
+        self.trace = trace
+        self.due = due
+        # Set by the sampler thread when sampling actually begins
+        self.started: Optional[float] = None
+        self.samples = 0
+        self.stacks: Dict[str, int] = {}
+
+    def _thread_labels(self, frames: Dict[int, Any]) -> List[str]:
+        # Work the task handed to run_in_thread, from the worker's entry point down
+        for thread_id in tuple(self.trace.threads if self.trace is not None else ()):
+            labels: List[str] = []
+            frame = frames.get(thread_id)
+            while frame is not None and frame.f_code is not _run_traced.__code__:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            if frame is not None:
+                labels.reverse()
+                return labels
+        return []
+
+    def sample(self, frames: Dict[int, Any]):
+        coro = self.task.get_coro()
+        labels: List[str] = []
+        if getattr(coro, "cr_running", False):
+            # On CPU (or blocking the event loop): the thread's real stack, trimmed to this task
+            frame = frames.get(self.thread_id)
+            root = getattr(coro, "cr_frame", None)
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                if frame is root:
+                    break
+                frame = frame.f_back
+            labels.reverse()
+        else:
+            # Suspended: walk the await chain so waiting time is attributed too
+            while coro is not None:
+                frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+                if frame is not None:
+                    labels.append(_frame_label(frame))
+                coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+            labels.extend(self._thread_labels(frames) or ["(await)"])
+        if labels:
+            key = ";".join(labels)
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+
+class StackSampler:
+    """
+    One background thread that samples the stacks of in-flight profiled requests.
+
+    Requests only register themselves with the time sampling should begin; the
+    sampler thread starts sampling each one when that time comes, so a request
+    that blocks the event loop is still picked up. The thread wakes every
+    `interval_ms` while any request is being sampled, sleeps until the next start
+    time otherwise, and not at all when nothing is registered. At most `max_active`
+    requests are sampled at once; one that comes due past that is never sampled.
+    """
+
+    def __init__(self, interval_ms: float = 10, max_active: int = 4):
+        self.interval = interval_ms / 1000
+        self.max_active = max_active
+        self._pending: Dict[int, _Profile] = {}
+        self._active: Dict[int, _Profile] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, task: Optional[asyncio.Task] = None, trace: Optional[RequestTrace] = None,
+              delay: float = 0.0) -> _Profile:
+        # Must be called on the event loop thread; `task` defaults to the current one
+        profile = _Profile(
+            task or asyncio.current_task(), threading.get_ident(), trace, time.perf_counter() + delay
+        )
+        with self._cond:
+            self._pending[id(profile)] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return profile
+
+    def stop(self, profile: _Profile):
+        # Held by the sampler while sampling, so a stopped profile is never written to afterwards
+        with self._cond:
+            self._pending.pop(id(profile), None)
+            self._active.pop(id(profile), None)
+
+    def _promote(self, now: float):
+        for key, profile in list(self._pending.items()):
+            if profile.due <= now:
+                del self._pending[key]
+                if len(self._active) < self.max_active:
+                    profile.started = now
+                    self._active[key] = profile
+
+    def _run(self):
+        next_sample = 0.0
+        with self._cond:
+            while True:
+                now = time.perf_counter()
+                self._promote(now)
+                if self._active and now >= next_sample:
+                    frames = sys._current_frames()
+                    for profile in self._active.values():
+                        try:
+                            profile.sample(frames)
+                        except Exception:
+                            # Stacks change under us; a torn sample is just dropped
+                            pass
+                    del frames
+                    next_sample = now + self.interval
+
+                wake_at = [profile.due for profile in self._pending.values()]
+                if self._active:
+                    wake_at.append(next_sample)
+                # wait() releases the lock, so requests can register and stop meanwhile
+                self._cond.wait(max(0.0, min(wake_at) - time.perf_counter()) if wake_at else None)
+
+
+def _run_traced(trace: RequestTrace, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+    thread_id = threading.get_ident()
+    trace.threads.add(thread_id)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        trace.threads.discard(thread_id)
+
+
+async def run_in_thread(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """asyncio.to_thread whose stack shows up under the awaiting request in its profile."""
+    trace = _current_trace.get()
+    if trace is None:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return await asyncio.to_thread(_run_traced, trace, fn, args, kwargs)
+
+
+class ProfileStore:
+    """Bounded on-disk ring buffer of request profiles (one JSON file each, oldest dropped first)."""
+
+    def __init__(self, directory: str, max_files: int = 200):
+        self.directory = Path(directory)
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def _files(self) -> List[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob("*.json"))
+
+    def save(self, profile: Dict[str, Any]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{profile['id']}.json"
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(profile, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            files = self._files()
+            for old in files[:max(0, len(files) - self.max_files)]:
+                old.unlink(missing_ok=True)
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        summaries = []
+        for path in reversed(self._files()[-limit:]):
+            profile = self.get(path.stem)
+            if profile is not None:
+                summaries.append({key: value for key, value in profile.items() if key != "stacks"})
+        return summaries
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        path = self.directory / f"{profile_id}.json"
+        # Ids are generated here; anything else (e.g. "../") is not a profile
+        if path.parent != self.directory or not path.is_file():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # Dropped by the ring buffer while being read
+            return None
+
+
+def folded_stacks(profile: Dict[str, Any]) -> str:
+    """Collapsed-stack text ("frame;frame;frame count"), as read by flamegraph.pl and speedscope."""
+    return "".join(f"{stack} {count}\n" for stack, count in profile.get("stacks", {}).items())
+
+
+class ProfilingMiddleware:
+    """
+    Keeps a request trace (stage timings, DB and token counters) for every API request,
+    and stores it for a share of requests plus every request slower than the threshold
+    (or failing with a 5xx).
+
+    Stack sampling costs a thread wake-up per interval, so only the randomly sampled
+    requests are sampled from the start. Any other request is sampled once it has run
+    for `slow_start_fraction` of the slow threshold, so a slow request's profile covers
+    its tail and fast requests are never sampled. That start is timed by the sampler
+    thread, not the event loop, so it also happens while a request blocks the loop.
+    At most `max_in_flight` requests are sampled at once; the rest keep just the trace.
+    """
+
+    def __init__(self, app, store: ProfileStore, sample_rate: float = 0.0,
+                 slow_request_ms: float = 0, interval_ms: float = 10,
+                 slow_start_fraction: float = 0.5, max_in_flight: int = 4):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.slow_request_ms = slow_request_ms
+        self.slow_start_fraction = slow_start_fraction
+        self.sampler = StackSampler(interval_ms, max_in_flight)
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if (
+            scope["type"] != "http"
+            or not path.startswith(PROFILED_PREFIX)
+            or path.startswith(EXCLUDED_PREFIX)
+            or (self.sample_rate <= 0 and self.slow_request_ms <= 0)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        response_status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response_status["code"] = message["status"]
+            await send(message)
+
+        sampled = random.random() < self.sample_rate
+        trace = RequestTrace()
+        token = _current_trace.set(trace)
+        started_at = time.time()
+        start = time.perf_counter()
+
+        profile = None
+        if sampled:
+            profile = self.sampler.start(trace=trace)
+        elif self.slow_request_ms > 0:
+            profile = self.sampler.start(
+                trace=trace, delay=self.slow_request_ms * self.slow_start_fraction / 1000
+            )
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            if profile is not None:
+                self.sampler.stop(profile)
+            _current_trace.reset(token)
+
+            if sampled:
+                reason = "sampled"
+            elif self.slow_request_ms > 0 and duration_ms >= self.slow_request_ms:
+                reason = "slow"
+            elif response_status["code"] >= 500:
+                reason = "error"
+            else:
+                reason = None
+
+            if reason:
+                # Written off the event loop; the response has already been sent
+                asyncio.get_running_loop().run_in_executor(None, self.store.save, {
+                    "id": f"{int(started_at * 1000):013d}-{uuid.uuid4().hex[:8]}",
+                    "created_at": started_at,
+                    "method": scope.get("method"),
+                    "path": path,
+                    "status": response_status["code"],
+                    "duration_ms": round(duration_ms, 2),
+                    "reason": reason,
+                    # Stacks cover the request from this offset; none if it was never sampled
+                    "sampled_from_ms": (
+                        None if profile is None or profile.started is None
+                        else round((profile.started - start) * 1000, 2)
+                    ),
+                    "samples": profile.samples if profile else 0,
+                    "interval_ms": self.sampler.interval * 1000,
+                    "trace": trace.to_dict(),
+                    "stacks": profile.stacks if profile else {}
+                })
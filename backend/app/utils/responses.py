@@ -0,0 +1,10 @@
+from typing import Any
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+class FastJSONResponse(ORJSONResponse):
+    """orjson-backed JSON response that renders datetimes the same way Pydantic does (UTC as 'Z')."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
@@ -1,39 +1,45 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
-import bcrypt
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-
-# passlib와 bcrypt 4.0+ 호환성 패치
-if not hasattr(bcrypt, "__about__"):
-    try:
-        bcrypt.__about__ = type("about", (object,), {"__version__": bcrypt.__version__})
-    except AttributeError:
-        # bcrypt 버전이 없을 경우 처리
-        pass
-
 from sqlalchemy.orm import Session
 from app.config import get_settings
 from app.database import get_db
 from app.models.user import User
 
 settings = get_settings()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__truncate_error=False)
 security = HTTPBearer()
 
 
+@lru_cache()
+def get_pwd_context():
+    # passlib/bcrypt are only needed for password checks, so load them on first use
+    import bcrypt
+    from passlib.context import CryptContext
+
+    # passlib와 bcrypt 4.0+ 호환성 패치
+    if not hasattr(bcrypt, "__about__"):
+        try:
+            bcrypt.__about__ = type("about", (object,), {"__version__": bcrypt.__version__})
+        except AttributeError:
+            # bcrypt 버전이 없을 경우 처리
+            pass
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__truncate_error=False)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     # bcrypt는 72바이트 제한이 있음
     password_bytes = plain_password.encode('utf-8')[:72]
-    return pwd_context.verify(password_bytes.decode('utf-8', errors='ignore'), hashed_password)
+    return get_pwd_context().verify(password_bytes.decode('utf-8', errors='ignore'), hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     # bcrypt는 72바이트 제한이 있음
     password_bytes = password.encode('utf-8')[:72]
-    return pwd_context.hash(password_bytes.decode('utf-8', errors='ignore'))
+    return get_pwd_context().hash(password_bytes.decode('utf-8', errors='ignore'))
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -0,0 +1,168 @@
+"""
+문서 본문 저장소 벤치마크
+합성 세특 코퍼스(기본 10만 chunk)로 본문을 Chroma에 함께 저장하는 기존 방식과
+zstd 압축 본문 저장소(SQLite)로 분리하는 방식의 디스크 크기와 질의당 I/O를 비교합니다 (API 호출 없음).
+
+- 기존: Chroma에 documents까지 저장, 질의 시 documents/metadatas/distances를 함께 조회
+- 변경: Chroma에는 벡터와 메타데이터만 저장, 질의는 ids/distances만 받고 최종 top-k 본문만 일괄 조회
+
+질의당 I/O는 /proc/self/io의 rchar(read 시스템 호출 바이트) 증가량으로 측정합니다 (Linux 전용).
+
+사용법:
+    python scripts/benchmark_doc_store.py [--chunks 100000] [--dims 256] [--queries 200] [--k 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import chromadb
+from chromadb.config import Settings
+from app.services.doc_store import DocumentStore, store_path
+
+SUBJECTS = ["국어", "수학", "영어", "물리학I", "화학I", "생명과학I", "정보", "사회문화", "한국사", "기술가정"]
+TOPICS = ["미적분", "알고리즘", "데이터 분석", "인공지능", "환경 문제", "유전 정보", "양자 역학", "문학 비평",
+          "통계적 추론", "프로그래밍", "암호 기술", "에너지 전환", "사회 불평등", "역사 해석", "자료 구조"]
+SENTENCES = [
+    "{topic}에 대한 깊은 관심을 바탕으로 관련 도서를 읽고 핵심 개념을 정리하여 발표함.",
+    "수업 시간에 배운 {topic}의 원리를 실생활 사례에 적용하는 탐구 보고서를 작성함.",
+    "모둠 활동에서 {topic} 관련 자료를 수집하고 분석하여 논리적인 결론을 도출하는 역할을 맡음.",
+    "{topic}의 한계를 스스로 질문하고 추가 자료를 찾아 해결 방안을 제시하는 등 탐구 역량이 뛰어남.",
+    "{topic}을 주제로 한 프로젝트에서 실험을 설계하고 결과를 그래프로 시각화하여 공유함.",
+    "친구들이 어려워하는 {topic} 개념을 쉽게 설명하는 자료를 만들어 학습 공동체에 기여함.",
+    "진로와 연계하여 {topic} 분야의 최신 연구 동향을 조사하고 자신의 생각을 덧붙여 정리함.",
+]
+
+
+def make_corpus(count: int, rng):
+    """
+    문장 템플릿을 조합해 합성 세특 chunk를 만듭니다.
+    """
+    documents, metadatas = [], []
+    for i in range(count):
+        parts = [
+            SENTENCES[rng.integers(len(SENTENCES))].format(topic=TOPICS[rng.integers(len(TOPICS))])
+            for _ in range(rng.integers(4, 12))
+        ]
+        documents.append(" ".join(parts))
+        metadatas.append({
+            "subject": SUBJECTS[rng.integers(len(SUBJECTS))],
+            "source_file": f"student_{i // 20:05d}"
+        })
+    return documents, metadatas
+
+
+def dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def read_bytes() -> int:
+    with open("/proc/self/io") as f:
+        for line in f:
+            if line.startswith("rchar:"):
+                return int(line.split()[1])
+    return 0
+
+
+def build(path: Path, ids, vectors, documents, metadatas, with_documents: bool):
+    client = chromadb.PersistentClient(path=str(path), settings=Settings(anonymized_telemetry=False))
+    collection = client.create_collection("doc_store_benchmark")
+    batch_size = 5000
+    for start in range(0, len(ids), batch_size):
+        end = start + batch_size
+        params = {
+            "ids": ids[start:end],
+            "embeddings": vectors[start:end].tolist(),
+            "metadatas": metadatas[start:end]
+        }
+        if with_documents:
+            params["documents"] = documents[start:end]
+        collection.add(**params)
+    return collection
+
+
+def measure(search, queries):
+    search(queries[0])  # load the HNSW index before measuring
+    before = read_bytes()
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return (read_bytes() - before) / len(queries), float(np.median(latencies))
+
+
+def run_benchmark(chunk_count: int, dims: int, n_queries: int, k: int):
+    rng = np.random.default_rng(11)
+    print(f"1. 합성 코퍼스 생성 중 ({chunk_count} chunks, {dims}차원)...")
+    documents, metadatas = make_corpus(chunk_count, rng)
+    ids = [f"doc_{i}" for i in range(chunk_count)]
+    vectors = rng.normal(size=(chunk_count, dims)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = [q.tolist() for q in rng.normal(size=(n_queries, dims)).astype(np.float32)]
+    raw_bytes = sum(len(doc.encode("utf-8")) for doc in documents)
+    print(f"   본문 원본 크기: {raw_bytes / 1024 / 1024:.1f} MB")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_dir, new_dir = Path(tmp_dir) / "old", Path(tmp_dir) / "new"
+
+        print("\n2. 기존 방식 (Chroma에 본문 저장) 구축 중...")
+        old_collection = build(old_dir, ids, vectors, documents, metadatas, with_documents=True)
+
+        print("3. 변경 방식 (본문 저장소 분리) 구축 중...")
+        new_collection = build(new_dir, ids, vectors, documents, metadatas, with_documents=False)
+        start = time.perf_counter()
+        doc_store = DocumentStore.build(store_path(str(new_dir), "doc_store_benchmark"), ids, documents, metadatas)
+        build_s = time.perf_counter() - start
+
+        store_bytes = doc_store.path.stat().st_size
+        print("\n" + "=" * 60)
+        print("디스크 크기")
+        print("=" * 60)
+        print(f"   기존 Chroma 전체:          {dir_size(old_dir) / 1024 / 1024:8.1f} MB")
+        print(f"   변경 Chroma + 본문 저장소: {dir_size(new_dir) / 1024 / 1024:8.1f} MB")
+        print(f"     └ 본문 저장소 (zstd):    {store_bytes / 1024 / 1024:8.1f} MB "
+              f"(원본 대비 {store_bytes / raw_bytes:.2f}, 구축 {build_s:.1f}s)")
+
+        def old_search(query):
+            return old_collection.query(
+                query_embeddings=[query], n_results=k, include=["documents", "metadatas", "distances"]
+            )
+
+        def new_search(query):
+            result = new_collection.query(query_embeddings=[query], n_results=k, include=["distances"])
+            return doc_store.get(result["ids"][0])
+
+        old_io, old_ms = measure(old_search, queries)
+        new_io, new_ms = measure(new_search, queries)
+        print("\n" + "=" * 60)
+        print(f"질의당 I/O 및 시간 (top-{k}, {n_queries}건 중앙값)")
+        print("=" * 60)
+        print(f"   기존: {old_io / 1024:8.1f} KB read, {old_ms:6.2f} ms")
+        print(f"   변경: {new_io / 1024:8.1f} KB read, {new_ms:6.2f} ms")
+
+        sample = new_search(queries[0])
+        expected = old_search(queries[0])
+        same = [sample[doc_id][0] for doc_id in expected["ids"][0]] == expected["documents"][0]
+        print(f"\n조회 본문 동일 여부: {'동일' if same else '다름'}")
+        doc_store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="문서 본문 저장소 벤치마크")
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--dims", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/io"):
+        print("WARNING: /proc/self/io가 없어 I/O 측정값은 0으로 표시됩니다.")
+    run_benchmark(args.chunks, args.dims, args.queries, args.k)
@@ -0,0 +1,118 @@
+"""
+임베딩 차원 축소/양자화 벤치마크
+활성 세특 컬렉션의 임베딩으로 차원(Matryoshka)과 양자화 설정별 recall, 검색 시간, 메모리를 비교합니다.
+
+메모리는 두 가지로 표시합니다.
+- index MB: 인덱스가 상주시키는 크기 (양자화 코드, 또는 float 벡터)
+- peak MB: 인덱스 생성과 질의 중 프로세스 최대 RSS 증가량 (질의당 임시 메모리 포함, Linux 전용)
+
+기준값은 1536차원 float 전수 검색 결과이며, 일부 문서를 질의로 떼어내어
+나머지 문서에 대해 검색합니다 (OpenAI API 호출 없음).
+
+사용법:
+    python scripts/benchmark_embeddings.py [--queries 100] [--k 5]
+"""
+
+import argparse
+import gc
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import numpy as np
+import chromadb
+from chromadb.config import Settings
+from app.services.collection_registry import CollectionRegistry, DEFAULT_ALIAS
+from app.services.local_index import LocalVectorIndex, QUANTIZATIONS, normalize
+
+
+CHROMA_PERSIST_DIR = Path(__file__).parent.parent / "chroma_db"
+DIMENSIONS = [1536, 1024, 512, 256, 128]
+
+
+def load_embeddings():
+    chroma_client = chromadb.PersistentClient(
+        path=str(CHROMA_PERSIST_DIR),
+        settings=Settings(anonymized_telemetry=False)
+    )
+    name = CollectionRegistry(str(CHROMA_PERSIST_DIR)).get_active(DEFAULT_ALIAS) or DEFAULT_ALIAS
+    data = chroma_client.get_collection(name).get(include=["embeddings", "metadatas"])
+    print(f"컬렉션: {name} ({len(data['ids'])} documents)")
+    return data["ids"], np.asarray(data["embeddings"], dtype=np.float32), data["metadatas"]
+
+
+def _status_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def reset_peak_rss() -> bool:
+    """프로세스 최대 RSS(VmHWM)를 현재 RSS로 되돌립니다. 지원하지 않으면 False."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def run_benchmark(n_queries: int, k: int, oversample: int):
+    ids, embeddings, metadatas = load_embeddings()
+    rng = np.random.default_rng(42)
+    order = rng.permutation(len(ids))
+    query_rows, corpus_rows = order[:n_queries], order[n_queries:]
+
+    corpus = embeddings[corpus_rows]
+    queries = embeddings[query_rows]
+    corpus_ids = [ids[i] for i in corpus_rows]
+    corpus_metadatas = [metadatas[i] for i in corpus_rows]
+
+    baseline = LocalVectorIndex(corpus_ids, normalize(corpus), corpus_metadatas)
+    truth = [set(baseline.search(q, k)[0]) for q in normalize(queries)]
+
+    print(f"\n질의 {len(queries)}건, recall@{k}, 재채점 oversample={oversample}")
+    print(f"{'dims':>6} {'quant':>7} {'recall':>8} {'p50 ms':>8} {'p95 ms':>8} {'index MB':>9} {'peak MB':>8}")
+    for dims in DIMENSIONS:
+        if dims > embeddings.shape[1]:
+            continue
+        vectors = normalize(corpus, dims)
+        dim_queries = normalize(queries, dims)
+        for quantization in QUANTIZATIONS:
+            gc.collect()
+            peak_supported = reset_peak_rss()
+            rss_before = _status_kb("VmRSS")
+            index = LocalVectorIndex(corpus_ids, vectors, corpus_metadatas,
+                                     quantization=quantization, oversample=oversample)
+            latencies, hits = [], 0
+            for query, expected in zip(dim_queries, truth):
+                start = time.perf_counter()
+                rows, _ = index.search(query, k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                hits += len(expected.intersection(rows))
+
+            recall = hits / (len(truth) * k)
+            peak = f"{(_status_kb('VmHWM') - rss_before) / 1024:>8.2f}" if peak_supported else f"{'-':>8}"
+            print(f"{dims:>6} {quantization:>7} {recall:>8.3f} "
+                  f"{np.percentile(latencies, 50):>8.3f} {np.percentile(latencies, 95):>8.3f} "
+                  f"{index.memory_bytes / 1024 / 1024:>9.2f} {peak}")
+            del index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="임베딩 차원/양자화 벤치마크")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--oversample", type=int, default=4)
+    args = parser.parse_args()
+
+    run_benchmark(args.queries, args.k, args.oversample)
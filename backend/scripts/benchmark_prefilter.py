@@ -0,0 +1,174 @@
+"""
+과목 필터 검색 벤치마크
+과목 파티션 크기별로 Chroma ANN + where 필터와 과목 인덱스 기반 정확 검색(SubjectIndex)의
+recall과 검색 시간을 비교합니다. 합성 데이터와 임시 Chroma 컬렉션을 사용합니다 (API 호출 없음).
+
+기본 데이터는 실제 임베딩처럼 주제별로 뭉친(clustered) 벡터입니다. 각 과목은 몇 개의 주제에
+걸쳐 있고, 질의도 해당 과목의 주제 근처에서 뽑습니다. --data gaussian 은 주제 없는
+등방성 노이즈로, HNSW에 가장 불리한 경우입니다.
+
+ANN recall이 --target-recall 이상이면서 정확 검색보다 빠른 가장 작은 파티션 크기가
+EXACT_SEARCH_MAX_PARTITION 을 정하는 기준입니다 (없으면 측정한 모든 크기에서 정확 검색이 낫습니다).
+
+사용법:
+    python scripts/benchmark_prefilter.py [--corpus 50000] [--dims 256] [--queries 50] [--k 5]
+                                          [--data clustered] [--search-ef 10 100]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import chromadb
+from chromadb.config import Settings
+from app.services.subject_index import PartitionCache, SubjectIndex
+
+PARTITION_SIZES = [20, 200, 2000, 5000, 10000, 20000]
+TOPICS_PER_SUBJECT = 8
+# Spread of a document around its topic; with unit topic vectors this gives an average
+# same-topic cosine of about 0.5, in the range seen between related OpenAI embeddings
+TOPIC_NOISE = 1.0
+
+
+def unit(vectors: np.ndarray) -> np.ndarray:
+    return (vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)).astype(np.float32)
+
+
+class SyntheticCorpus:
+    """
+    파티션 크기별 과목과 나머지를 채우는 과목으로 이루어진 합성 코퍼스입니다.
+    """
+
+    def __init__(self, corpus_size: int, dims: int, data: str, rng):
+        self.dims = dims
+        self.data = data
+        self.rng = rng
+
+        subjects = []
+        for size in PARTITION_SIZES:
+            subjects.extend([f"subject_{size}"] * size)
+        subjects.extend(["filler"] * max(0, corpus_size - len(subjects)))
+        self.subjects = np.array(subjects)
+        rng.shuffle(self.subjects)
+
+        names = sorted(set(self.subjects))
+        self.topics = {
+            name: unit(rng.normal(size=(TOPICS_PER_SUBJECT * (4 if name == "filler" else 1), dims)))
+            for name in names
+        }
+        self.vectors = np.empty((len(self.subjects), dims), dtype=np.float32)
+        for name in names:
+            rows = np.where(self.subjects == name)[0]
+            self.vectors[rows] = self.sample(name, len(rows))
+
+    def sample(self, subject: str, n: int) -> np.ndarray:
+        if self.data == "gaussian":
+            return unit(self.rng.normal(size=(n, self.dims)))
+        topics = self.topics[subject]
+        centers = topics[self.rng.integers(len(topics), size=n)]
+        noise = self.rng.normal(size=(n, self.dims)) * TOPIC_NOISE / np.sqrt(self.dims)
+        return unit(centers + noise)
+
+
+def build_collection(client, corpus: SyntheticCorpus, search_ef: Optional[int]):
+    metadata = {"hnsw:space": "l2"}
+    if search_ef:
+        metadata["hnsw:search_ef"] = search_ef
+    collection = client.create_collection(f"prefilter_benchmark_ef{search_ef or 'default'}", metadata=metadata)
+    total = len(corpus.subjects)
+    batch_size = 5000
+    for start in range(0, total, batch_size):
+        end = min(start + batch_size, total)
+        collection.add(
+            ids=[f"doc_{i}" for i in range(start, end)],
+            embeddings=corpus.vectors[start:end].tolist(),
+            metadatas=[{"subject": s} for s in corpus.subjects[start:end]],
+            documents=[f"문서 {i}" for i in range(start, end)]
+        )
+    print(f"   {total} documents 저장 (hnsw:search_ef={search_ef or 'Chroma 기본값 10'})")
+    return collection
+
+
+def measure(search, queries: np.ndarray, truth: List[set]) -> Dict[str, float]:
+    hits, latencies = 0, []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = search(query.tolist())["ids"][0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(expected.intersection(found))
+    return {"recall": hits / (len(truth) * len(next(iter(truth)))), "ms": float(np.median(latencies))}
+
+
+def run_benchmark(corpus_size: int, dims: int, n_queries: int, k: int, data: str,
+                  search_efs: List[int], target_recall: float):
+    rng = np.random.default_rng(7)
+    print(f"1. 합성 코퍼스 생성 중 ({data})...")
+    corpus = SyntheticCorpus(corpus_size, dims, data, rng)
+
+    queries = {f"subject_{size}": corpus.sample(f"subject_{size}", n_queries) for size in PARTITION_SIZES}
+    truth = {}
+    for subject, subject_queries in queries.items():
+        rows = np.where(corpus.subjects == subject)[0]
+        truth[subject] = []
+        for query in subject_queries:
+            distances = ((corpus.vectors[rows] - query) ** 2).sum(axis=1)
+            truth[subject].append({f"doc_{rows[i]}" for i in np.argsort(distances)[:k]})
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        client = chromadb.PersistentClient(path=tmp_dir, settings=Settings(anonymized_telemetry=False))
+        for search_ef in search_efs:
+            print(f"\n2. 검색 비교 (전체 {len(corpus.subjects)}건, 질의 {n_queries}건, recall@{k})")
+            collection = build_collection(client, corpus, search_ef)
+            # Every measured partition stays cached, as the service would keep a hot subject
+            index = SubjectIndex(collection, PartitionCache(sum(PARTITION_SIZES) * dims * 4),
+                                 max_exact=max(PARTITION_SIZES))
+
+            print(f"{'partition':>10} {'ANN recall':>11} {'ANN ms':>8} {'exact recall':>13} {'exact ms':>9} "
+                  f"{'cache MB':>9}")
+            crossover = None
+            for size in PARTITION_SIZES:
+                subject = f"subject_{size}"
+                index.query([queries[subject][0].tolist()], subject, k, ["documents", "metadatas"])  # warm cache
+
+                ann = measure(lambda q: collection.query(
+                    query_embeddings=[q], n_results=k, where={"subject": subject},
+                    include=["documents", "metadatas", "distances"]
+                ), queries[subject], truth[subject])
+                exact = measure(
+                    lambda q: index.query([q], subject, k, ["documents", "metadatas"]),
+                    queries[subject], truth[subject]
+                )
+                if crossover is None and ann["recall"] >= target_recall and ann["ms"] < exact["ms"]:
+                    crossover = size
+
+                print(f"{size:>10} {ann['recall']:>11.3f} {ann['ms']:>8.2f} "
+                      f"{exact['recall']:>13.3f} {exact['ms']:>9.2f} {size * dims * 4 / 2**20:>9.1f}")
+
+            if crossover is None:
+                print(f"   ANN이 recall {target_recall} 이상으로 정확 검색보다 빠른 크기 없음 "
+                      f"(최대 {max(PARTITION_SIZES)}까지 정확 검색이 유리)")
+            else:
+                print(f"   ANN 우위 시작 크기: {crossover}")
+            client.delete_collection(collection.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="과목 필터 검색 벤치마크")
+    parser.add_argument("--corpus", type=int, default=50000)
+    parser.add_argument("--dims", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--data", choices=["clustered", "gaussian"], default="clustered")
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[10, 100],
+                        help="비교할 hnsw:search_ef 값 (Chroma 기본값 10)")
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    args = parser.parse_args()
+
+    run_benchmark(args.corpus, args.dims, args.queries, args.k, args.data, args.search_ef, args.target_recall)
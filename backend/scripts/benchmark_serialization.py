@@ -0,0 +1,108 @@
+"""
+대화 기록 응답 직렬화 벤치마크
+/api/history 한 페이지(기본 100건)를 만드는 데 걸리는 시간을 기존 방식과 비교합니다.
+
+- 기존: 행마다 ChatResponse.model_validate → ChatHistoryResponse → FastAPI 응답 검증/직렬화 → json.dumps
+- 변경: DB 컬럼 행을 dict로 바로 orjson 직렬화 (FastJSONResponse)
+
+gzip/brotli 압축 후 크기도 함께 출력합니다.
+
+사용법:
+    python scripts/benchmark_serialization.py [--rows 100] [--answer-chars 2000] [--iterations 200]
+"""
+
+import argparse
+import asyncio
+import gzip
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import brotli
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.schemas import ChatHistoryResponse, ChatResponse
+from app.utils.responses import FastJSONResponse
+
+SAMPLE_TEXT = "수학 시간에 미적분의 개념을 활용하여 실생활 문제를 탐구하고 발표하는 활동을 추천합니다. "
+
+
+def make_rows(count: int, answer_chars: int):
+    """
+    ORM 객체(기존 경로)와 컬럼 행(변경 경로)을 같은 데이터로 만듭니다.
+    """
+    answer = (SAMPLE_TEXT * (answer_chars // len(SAMPLE_TEXT) + 1))[:answer_chars]
+    Row = namedtuple("Row", ["id", "subject", "question", "answer", "created_at"])
+    now = datetime(2025, 3, 1, 12, 0, 0)
+    rows = [
+        Row(i, "수학I", f"컴퓨터과학과 지망생에게 맞는 수학I 활동은? ({i})", answer, now - timedelta(minutes=i))
+        for i in range(count)
+    ]
+    orm_objects = [SimpleNamespace(**row._asdict()) for row in rows]
+    return orm_objects, rows
+
+
+async def old_path(field, orm_objects) -> bytes:
+    content = ChatHistoryResponse(
+        histories=[ChatResponse.model_validate(h) for h in orm_objects],
+        total=len(orm_objects)
+    )
+    serialized = await serialize_response(field=field, response_content=content)
+    return JSONResponse(serialized).body
+
+
+def new_path(rows) -> bytes:
+    return FastJSONResponse({
+        "histories": [row._asdict() for row in rows],
+        "total": len(rows)
+    }).body
+
+
+async def run_benchmark(row_count: int, answer_chars: int, iterations: int):
+    orm_objects, rows = make_rows(row_count, answer_chars)
+    field = create_response_field(name="response", type_=ChatHistoryResponse)
+
+    old_body = await old_path(field, orm_objects)
+    new_body = new_path(rows)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await old_path(field, orm_objects)
+    old_ms = (time.perf_counter() - start) * 1000 / iterations
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        new_path(rows)
+    new_ms = (time.perf_counter() - start) * 1000 / iterations
+
+    print("=" * 60)
+    print(f"/api/history 페이지 직렬화 ({row_count}건, 답변 {answer_chars}자)")
+    print("=" * 60)
+    print(f"   기존 (Pydantic 검증 + json):  {old_ms:8.3f} ms/page")
+    print(f"   변경 (orjson, 재검증 없음):  {new_ms:8.3f} ms/page")
+    print(f"   속도 향상: {old_ms / new_ms:.1f}x")
+
+    print("\n응답 크기:")
+    print(f"   원본:   {len(new_body) / 1024:8.1f} KB")
+    print(f"   gzip:   {len(gzip.compress(new_body, 6)) / 1024:8.1f} KB")
+    print(f"   brotli: {len(brotli.compress(new_body, quality=4)) / 1024:8.1f} KB")
+
+    same = ChatHistoryResponse.model_validate_json(old_body) == ChatHistoryResponse.model_validate_json(new_body)
+    print(f"\n응답 내용 동일 여부: {'동일' if same else '다름'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="대화 기록 응답 직렬화 벤치마크")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--answer-chars", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.rows, args.answer_chars, args.iterations))
@@ -1,13 +1,20 @@
 """
 ChromaDB 초기화 스크립트
 세부능력특기사항 데이터를 파싱하여 ChromaDB에 저장합니다.
+
+새 데이터는 버전 컬렉션(setuek_collection_v{n})에 따로 구축한 뒤 검증이 끝나면
+별칭 포인터를 교체하므로, 재적재 중에도 서비스 검색은 중단되지 않습니다.
 """
 
+import argparse
+import json
 import os
+import random
 import re
+import shutil
 import sys
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from openai import OpenAI
 from dotenv import load_dotenv
 
@@ -18,6 +25,16 @@ load_dotenv()
 
 import chromadb
 from chromadb.config import Settings
+from app.config import get_settings
+from app.services.collection_registry import (
+    CollectionRegistry,
+    DEFAULT_DEPARTMENT,
+    DEFAULT_UNIVERSITY,
+    collect_garbage,
+    tenant_alias
+)
+from app.services.doc_store import DocumentStore, store_path
+from app.services.local_index import LocalVectorIndex, index_path, normalize
 
 
 # Configuration
@@ -25,6 +42,13 @@ DATA_DIR = Path(__file__).parent.parent.parent / "상명대_컴퓨터과학과_
 CHROMA_PERSIST_DIR = Path(__file__).parent.parent / "chroma_db"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Chroma's default search_ef (10) loses recall on filtered queries (scripts/benchmark_prefilter.py);
+# only subjects above EXACT_SEARCH_MAX_PARTITION reach the ANN, and 100 keeps their recall@5 near 0.96+
+HNSW_SEARCH_EF = 100
+
+# Identical chunks get identical embeddings, so the self-query may return a twin instead
+SELF_MATCH_MAX_DISTANCE = 1e-4
+
 
 def parse_txt_file(file_path: Path) -> List[Dict[str, str]]:
     """
@@ -121,72 +145,89 @@ def normalize_subject(subject: str) -> str:
     return normalizations.get(subject, subject)
 
 
-def get_embeddings(texts: List[str], client: OpenAI) -> List[List[float]]:
+def get_embeddings(texts: List[str], client: OpenAI, dimensions: Optional[int] = None) -> List[List[float]]:
     """
     OpenAI API를 사용하여 텍스트 임베딩을 생성합니다.
+    dimensions를 지정하면 단축된(Matryoshka) 임베딩을 받습니다.
     """
     embeddings = []
     batch_size = 100  # OpenAI API batch limit
 
     for i in range(0, len(texts), batch_size):
         batch = texts[i:i + batch_size]
-        response = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=batch
-        )
+        params = {"model": "text-embedding-3-small", "input": batch}
+        if dimensions:
+            params["dimensions"] = dimensions
+        response = client.embeddings.create(**params)
         embeddings.extend([item.embedding for item in response.data])
         print(f"  Embedded {min(i + batch_size, len(texts))}/{len(texts)} documents")
 
     return embeddings
 
 
-def init_vectordb():
+def validate_collection(collection, ids: List[str], embeddings: List[List[float]],
+                        metadatas: List[Dict[str, str]], doc_store: DocumentStore,
+                        documents: List[str], sample_size: int = 5) -> bool:
     """
-    메인 초기화 함수
+    새 컬렉션을 활성화하기 전에 문서 수, 샘플 쿼리 결과, 본문 저장소를 검증합니다.
     """
-    print("=" * 60)
-    print("세부능력특기사항 ChromaDB 초기화 시작")
-    print("=" * 60)
-
-    if not OPENAI_API_KEY:
-        print("ERROR: OPENAI_API_KEY가 설정되지 않았습니다.")
-        print(".env 파일에 OPENAI_API_KEY를 설정해주세요.")
-        return
-
-    # Initialize OpenAI client
-    client = OpenAI(api_key=OPENAI_API_KEY)
-
-    # Initialize ChromaDB
-    print("\n1. ChromaDB 초기화 중...")
-    CHROMA_PERSIST_DIR.mkdir(parents=True, exist_ok=True)
-
-    chroma_client = chromadb.PersistentClient(
-        path=str(CHROMA_PERSIST_DIR),
-        settings=Settings(anonymized_telemetry=False)
-    )
-
-    # Delete existing collection if exists
-    try:
-        chroma_client.delete_collection("setuek_collection")
-        print("   기존 컬렉션 삭제됨")
-    except:
-        pass
-
-    collection = chroma_client.create_collection(
-        name="setuek_collection",
-        metadata={"description": "세부능력특기사항 데이터"}
-    )
-    print("   새 컬렉션 생성됨")
+    count = collection.count()
+    print(f"   컬렉션 내 문서 수: {count} (기대값: {len(ids)})")
+    if count != len(ids) or doc_store.count() != len(ids):
+        print("   ERROR: 문서 수가 일치하지 않습니다.")
+        return False
+
+    # 저장된 임베딩으로 질의하면 자기 자신(또는 본문이 같은 chunk)이 거리 ≈0으로 1순위에 나와야 합니다.
+    for i in random.sample(range(len(ids)), min(sample_size, len(ids))):
+        result = collection.query(
+            query_embeddings=[embeddings[i]],
+            n_results=1,
+            where={"subject": metadatas[i]["subject"]},
+            include=["distances"]
+        )
+        if not result["ids"] or not result["ids"][0] or (
+            result["ids"][0][0] != ids[i] and result["distances"][0][0] > SELF_MATCH_MAX_DISTANCE
+        ):
+            print(f"   ERROR: 샘플 쿼리 검증 실패 ({ids[i]})")
+            return False
+        if doc_store.get([ids[i]]).get(ids[i], (None,))[0] != documents[i]:
+            print(f"   ERROR: 본문 저장소 검증 실패 ({ids[i]})")
+            return False
+
+    print(f"   샘플 쿼리 {min(sample_size, len(ids))}건 검증 통과")
+    return True
+
+
+def ingest_corpus(
+    chroma_client,
+    registry: CollectionRegistry,
+    client: OpenAI,
+    university: str,
+    department: str,
+    data_dir: Path,
+    dimensions: Optional[int] = None,
+    build_local_index: bool = False
+) -> bool:
+    """
+    한 대학/학과 코퍼스를 새 버전 컬렉션에 적재하고 검증 후 활성화합니다.
+    """
+    alias = tenant_alias(university, department)
+    existing_names = [c.name for c in chroma_client.list_collections()]
+    collection_name = registry.next_version_name(alias, existing_names)
+    print(f"\n[{university} {department}] {data_dir}")
+    print(f"   별칭: {alias}")
+    print(f"   현재 활성 컬렉션: {registry.get_active(alias) or '없음'}")
+    print(f"   새 버전 컬렉션: {collection_name}")
 
     # Parse all txt files
     print("\n2. 데이터 파일 파싱 중...")
     all_chunks = []
 
-    if not DATA_DIR.exists():
-        print(f"ERROR: 데이터 디렉토리가 존재하지 않습니다: {DATA_DIR}")
-        return
+    if not data_dir.exists():
+        print(f"ERROR: 데이터 디렉토리가 존재하지 않습니다: {data_dir}")
+        return False
 
-    txt_files = list(DATA_DIR.glob("*.txt"))
+    txt_files = list(data_dir.glob("*.txt"))
     print(f"   발견된 파일 수: {len(txt_files)}")
 
     for file_path in txt_files:
@@ -198,7 +239,7 @@ def init_vectordb():
 
     if not all_chunks:
         print("ERROR: 추출된 데이터가 없습니다.")
-        return
+        return False
 
     # Get subject statistics
     subject_counts = {}
@@ -213,32 +254,150 @@ def init_vectordb():
     # Generate embeddings
     print("\n4. 임베딩 생성 중...")
     texts = [f"[{chunk['subject']}] {chunk['content']}" for chunk in all_chunks]
-    embeddings = get_embeddings(texts, client)
+    embeddings = get_embeddings(texts, client, dimensions)
+    print(f"   임베딩 차원: {len(embeddings[0])}")
 
-    # Add to ChromaDB
+    # Add to ChromaDB (built off to the side; the live alias is untouched)
     print("\n5. ChromaDB에 저장 중...")
+    collection_metadata = {
+        "description": "세부능력특기사항 데이터",
+        "university": university,
+        "department": department,
+        # Lets the service pick exact vs ANN search per subject without scanning metadata
+        "subject_counts": json.dumps(subject_counts, ensure_ascii=False),
+        # Chunk bodies live in the compressed side store, not in Chroma
+        "document_store": "zstd",
+        "hnsw:search_ef": HNSW_SEARCH_EF
+    }
+    if dimensions:
+        collection_metadata["embedding_dimensions"] = dimensions
+    collection = chroma_client.create_collection(
+        name=collection_name,
+        metadata=collection_metadata
+    )
     ids = [f"doc_{i}" for i in range(len(all_chunks))]
     documents = [chunk["content"] for chunk in all_chunks]
-    metadatas = [{"subject": chunk["subject"], "source_file": chunk["source_file"]} for chunk in all_chunks]
+    metadatas = [
+        {
+            "subject": chunk["subject"],
+            "source_file": chunk["source_file"],
+            "university": university,
+            "department": department
+        }
+        for chunk in all_chunks
+    ]
+
+    doc_store = DocumentStore.build(store_path(str(CHROMA_PERSIST_DIR), collection_name), ids, documents, metadatas)
+    print(f"   문서 본문 저장소: {doc_store.path.stat().st_size / 1024 / 1024:.1f} MB (zstd 압축)")
 
     collection.add(
         ids=ids,
-        documents=documents,
         metadatas=metadatas,
         embeddings=embeddings
     )
 
     print(f"   {len(all_chunks)} documents 저장 완료")
 
+    if build_local_index:
+        local_index = LocalVectorIndex(ids, normalize(embeddings), metadatas)
+        local_index.save(index_path(str(CHROMA_PERSIST_DIR), collection_name))
+        print(f"   로컬 인덱스 저장 완료 ({local_index.memory_bytes / 1024 / 1024:.1f} MB)")
+
     # Verify
     print("\n6. 저장 확인...")
-    count = collection.count()
-    print(f"   컬렉션 내 문서 수: {count}")
+    if not validate_collection(collection, ids, embeddings, metadatas, doc_store, documents):
+        chroma_client.delete_collection(collection_name)
+        doc_store.close()
+        shutil.rmtree(index_path(str(CHROMA_PERSIST_DIR), collection_name), ignore_errors=True)
+        store_path(str(CHROMA_PERSIST_DIR), collection_name).unlink(missing_ok=True)
+        print(f"   검증 실패로 {collection_name} 삭제됨 (활성 컬렉션은 그대로 유지)")
+        return False
+
+    # Swap alias
+    print("\n7. 활성 컬렉션 교체 중...")
+    registry.activate(alias, collection_name, tenant={
+        "university": university,
+        "department": department,
+        "subjects": sorted(subject_counts)
+    }, existing_names=existing_names)
+    print(f"   {alias} -> {collection_name}")
+
+    deleted = collect_garbage(chroma_client, registry, alias)
+    for name in deleted:
+        print(f"   보관 기간이 지난 버전 삭제됨: {name}")
+
+    return True
+
+
+def parse_corpus_arg(value: str) -> Tuple[str, str, Path]:
+    """
+    "대학:학과:경로" 형식의 --corpus 인자를 파싱합니다.
+    """
+    parts = value.split(":", 2)
+    if len(parts) != 3 or not all(parts):
+        raise argparse.ArgumentTypeError("--corpus는 '대학:학과:경로' 형식이어야 합니다.")
+    return parts[0], parts[1], Path(parts[2])
+
+
+def init_vectordb(
+    corpora: Optional[List[Tuple[str, str, Path]]] = None,
+    dimensions: Optional[int] = None,
+    build_local_index: bool = False
+):
+    """
+    메인 초기화 함수
+    """
+    print("=" * 60)
+    print("세부능력특기사항 ChromaDB 초기화 시작")
+    print("=" * 60)
+
+    if not OPENAI_API_KEY:
+        print("ERROR: OPENAI_API_KEY가 설정되지 않았습니다.")
+        print(".env 파일에 OPENAI_API_KEY를 설정해주세요.")
+        return
+
+    if not corpora:
+        corpora = [(DEFAULT_UNIVERSITY, DEFAULT_DEPARTMENT, DATA_DIR)]
+
+    # A server on the local backend should find a local index for every version it activates
+    if get_settings().VECTOR_INDEX_BACKEND == "local" and not build_local_index:
+        print("VECTOR_INDEX_BACKEND=local 이므로 로컬 인덱스도 함께 생성합니다.")
+        build_local_index = True
+
+    # Initialize OpenAI client
+    client = OpenAI(api_key=OPENAI_API_KEY)
+
+    # Initialize ChromaDB
+    print("\n1. ChromaDB 초기화 중...")
+    CHROMA_PERSIST_DIR.mkdir(parents=True, exist_ok=True)
+
+    chroma_client = chromadb.PersistentClient(
+        path=str(CHROMA_PERSIST_DIR),
+        settings=Settings(anonymized_telemetry=False)
+    )
+    registry = CollectionRegistry(str(CHROMA_PERSIST_DIR))
+
+    results = []
+    for university, department, data_dir in corpora:
+        ok = ingest_corpus(chroma_client, registry, client, university, department,
+                           data_dir, dimensions, build_local_index)
+        results.append((university, department, ok))
 
     print("\n" + "=" * 60)
+    for university, department, ok in results:
+        print(f"   {university} {department}: {'완료' if ok else '실패 (기존 버전 유지)'}")
     print("ChromaDB 초기화 완료!")
     print("=" * 60)
 
 
 if __name__ == "__main__":
-    init_vectordb()
+    parser = argparse.ArgumentParser(description="세특 데이터 ChromaDB 초기화")
+    parser.add_argument("--corpus", type=parse_corpus_arg, action="append", default=None,
+                        help="'대학:학과:경로' 형식, 여러 번 지정 가능 (기본값은 상명대 컴퓨터과학과 데이터)")
+    parser.add_argument("--dimensions", type=int, default=None,
+                        help="단축 임베딩 차원 (예: 512, 기본값은 모델 기본 1536)")
+    parser.add_argument("--local-index", action="store_true",
+                        help="VECTOR_INDEX_BACKEND=local 용 로컬 인덱스도 함께 생성 (이 설정이면 항상 생성)")
+    args = parser.parse_args()
+
+    init_vectordb(corpora=args.corpus, dimensions=args.dimensions, build_local_index=args.local_index)
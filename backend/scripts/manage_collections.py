@@ -0,0 +1,94 @@
+"""
+ChromaDB 컬렉션 버전 관리 스크립트
+활성 버전 확인, 이전 버전으로 롤백, 오래된 버전 정리를 수행합니다.
+
+사용법:
+    python scripts/manage_collections.py status
+    python scripts/manage_collections.py rollback [--university 상명대학교 --department 컴퓨터과학과]
+    python scripts/manage_collections.py gc [--retention-hours 24]
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import chromadb
+from chromadb.config import Settings
+from app.services.collection_registry import (
+    CollectionRegistry,
+    DEFAULT_DEPARTMENT,
+    DEFAULT_UNIVERSITY,
+    collect_garbage,
+    tenant_alias
+)
+
+
+CHROMA_PERSIST_DIR = Path(__file__).parent.parent / "chroma_db"
+
+
+def format_time(timestamp) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S") if timestamp else "-"
+
+
+def show_status(chroma_client, registry: CollectionRegistry):
+    collections = chroma_client.list_collections()
+    for alias, entry in sorted(registry.list_aliases().items()):
+        tenant = entry.get("tenant") or {}
+        print(f"별칭: {alias} ({tenant.get('university', '-')} {tenant.get('department', '-')})")
+        print(f"  활성 버전: {entry.get('active') or '없음'} (활성화: {format_time(entry.get('activated_at'))})")
+        print(f"  롤백 대상: {entry.get('previous') or '없음'}")
+
+        print("  저장된 버전:")
+        for collection in collections:
+            if collection.name != alias and not collection.name.startswith(f"{alias}_v"):
+                continue
+            retired_at = entry.get("retired", {}).get(collection.name)
+            state = "활성" if collection.name == entry.get("active") else f"비활성 ({format_time(retired_at)}부터)"
+            print(f"    - {collection.name}: {collection.count()} documents, {state}")
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="세특 컬렉션 버전 관리")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status", help="활성 버전과 보관 중인 버전 확인")
+    rollback_parser = subparsers.add_parser("rollback", help="직전 버전으로 별칭 되돌리기")
+    rollback_parser.add_argument("--university", default=DEFAULT_UNIVERSITY)
+    rollback_parser.add_argument("--department", default=DEFAULT_DEPARTMENT)
+    gc_parser = subparsers.add_parser("gc", help="보관 기간이 지난 버전 삭제 (모든 대학/학과)")
+    gc_parser.add_argument("--retention-hours", type=float, default=None)
+    args = parser.parse_args()
+
+    chroma_client = chromadb.PersistentClient(
+        path=str(CHROMA_PERSIST_DIR),
+        settings=Settings(anonymized_telemetry=False)
+    )
+    registry = CollectionRegistry(str(CHROMA_PERSIST_DIR))
+
+    if args.command == "status":
+        show_status(chroma_client, registry)
+    elif args.command == "rollback":
+        alias = tenant_alias(args.university, args.department)
+        try:
+            name = registry.rollback(alias)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        print(f"롤백 완료: {alias} -> {name}")
+    elif args.command == "gc":
+        deleted = []
+        for alias in list(registry.list_aliases()):
+            deleted.extend(collect_garbage(chroma_client, registry, alias, args.retention_hours))
+        print(f"삭제된 버전: {', '.join(deleted) if deleted else '없음'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+DB 스키마 마이그레이션 스크립트
+앱 부팅 시마다 실행하던 테이블 생성을 별도 단계로 분리했습니다.
+배포 시 서버를 띄우기 전에 한 번 실행하세요.
+
+- 없는 테이블을 생성합니다.
+- 이미 있는 테이블에 모델에 정의된 인덱스가 없으면 추가합니다.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import inspect
+from app.database import Base, engine
+import app.models  # noqa: F401  (registers all tables on Base.metadata)
+
+
+def migrate():
+    """
+    메인 마이그레이션 함수
+    """
+    print("=" * 60)
+    print("DB 스키마 마이그레이션 시작")
+    print("=" * 60)
+
+    existing_tables = set(inspect(engine).get_table_names())
+
+    print("\n1. 테이블 생성 중...")
+    Base.metadata.create_all(bind=engine)
+    for table in Base.metadata.sorted_tables:
+        state = "이미 존재" if table.name in existing_tables else "생성됨"
+        print(f"   - {table.name}: {state}")
+
+    # create_all only adds indexes together with new tables
+    print("\n2. 인덱스 확인 중...")
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=engine)
+                print(f"   - {table.name}.{index.name}: 추가됨")
+
+    print("\n" + "=" * 60)
+    print("마이그레이션 완료!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    migrate()
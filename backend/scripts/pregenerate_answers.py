@@ -0,0 +1,226 @@
+"""
+자주 묻는 질문 답변 사전 생성 스크립트
+chat_histories에서 과목별로 자주 나오는 질문 유형을 찾아 RAGService로 답변을 미리 생성합니다.
+질문 유형은 임베딩 유사도로 묶으며, 서버는 새 질문을 가장 가까운 유형 중심(centroid)에 매칭합니다.
+
+생성된 답변은 현재 활성 컬렉션 버전과 함께 저장되며, 컬렉션이 재구축되면
+버전이 달라져 자동으로 무효화됩니다 (이 스크립트는 이전 버전 답변도 정리합니다).
+
+사용법:
+    python scripts/pregenerate_answers.py [--days 90] [--min-count 3] [--top 20] [--workers 4] [--threshold 0.85]
+"""
+
+import argparse
+import asyncio
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import ChatHistory, PrecomputedAnswer
+from app.services.precomputed_answers import (
+    blob_to_centroid,
+    centroid_to_blob,
+    normalize_question
+)
+from app.services.rag_service import RAGService
+from app.services.vectordb import VectorDBService
+
+
+def count_questions(db, days: int) -> Dict[str, Dict[str, Counter]]:
+    """
+    과목별로 정규화된 질문 형태와 그 원문 표현별 횟수를 셉니다.
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+    rows = (
+        db.query(ChatHistory.subject, ChatHistory.question)
+        .filter(ChatHistory.created_at >= since)
+        .yield_per(1000)
+    )
+
+    forms: Dict[str, Dict[str, Counter]] = defaultdict(lambda: defaultdict(Counter))
+    for subject, question in rows:
+        forms[subject][normalize_question(question)][question.strip()] += 1
+    return forms
+
+
+def cluster_questions(forms: Dict[str, Counter], embeddings, threshold: float) -> List[Dict]:
+    """
+    한 과목의 질문 형태를 임베딩 유사도로 묶습니다.
+
+    자주 나온 형태부터 차례로, 가장 가까운 군집 중심과의 코사인 유사도가 threshold 이상이면
+    그 군집에 넣고 아니면 새 군집을 만듭니다. 중심은 횟수 가중 평균입니다.
+    """
+    import numpy as np
+
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    variants_by_form = list(forms.values())
+    totals = [sum(variants.values()) for variants in variants_by_form]
+
+    clusters: List[Dict] = []
+    centroids = np.empty((0, vectors.shape[1]), dtype=np.float32)
+    for i in sorted(range(len(totals)), key=lambda i: -totals[i]):
+        scores = centroids @ vectors[i] if len(clusters) else np.empty(0)
+        best = int(np.argmax(scores)) if len(scores) else -1
+        if best >= 0 and scores[best] >= threshold:
+            cluster = clusters[best]
+            cluster["sum"] += totals[i] * vectors[i]
+            centroids[best] = cluster["sum"] / max(float(np.linalg.norm(cluster["sum"])), 1e-12)
+        else:
+            cluster = {"sum": totals[i] * vectors[i], "variants": Counter()}
+            clusters.append(cluster)
+            centroids = np.vstack([centroids, vectors[i]])
+        cluster["variants"].update(variants_by_form[i])
+
+    return [
+        {
+            # Most frequent raw wording is used as the prompt
+            "question": cluster["variants"].most_common(1)[0][0],
+            "count": sum(cluster["variants"].values()),
+            "centroid": centroids[i]
+        }
+        for i, cluster in enumerate(clusters)
+    ]
+
+
+def embed_forms(rag_service: RAGService, subject: str, forms: Dict[str, Counter]):
+    """
+    질문 형태별 임베딩: 원문 표현들의 임베딩을 횟수 가중 평균합니다.
+    """
+    import numpy as np
+
+    # Live requests embed the raw wording, so the centroids are built from raw wordings too;
+    # the normalized form only decides which wordings count as the same question
+    variants = [variant for counts in forms.values() for variant in counts]
+    vectors = np.asarray(rag_service.get_embeddings(
+        [rag_service.question_text(subject, variant) for variant in variants]
+    ), dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    by_variant = dict(zip(variants, vectors))
+
+    return np.stack([
+        sum(count * by_variant[variant] for variant, count in counts.items())
+        for counts in forms.values()
+    ])
+
+
+def mine_frequent_questions(db, rag_service: RAGService, days: int, min_count: int,
+                            top: int, threshold: float) -> List[Dict]:
+    """
+    과목별로 의미가 비슷한 질문을 묶어 자주 나온 질문 유형을 추출합니다.
+    """
+    clusters = []
+    for subject, forms in count_questions(db, days).items():
+        embeddings = embed_forms(rag_service, subject, forms)
+        items = [
+            {"subject": subject, **cluster}
+            for cluster in cluster_questions(forms, embeddings, threshold)
+            if cluster["count"] >= min_count
+        ]
+        clusters.extend(sorted(items, key=lambda x: -x["count"])[:top])
+    return clusters
+
+
+def generate_answer(subject: str, question: str) -> str:
+    # get_answer blocks on the OpenAI client, so each worker thread runs its own event loop
+    return asyncio.run(RAGService().get_answer(subject=subject, question=question))
+
+
+def pregenerate_answers(days: int, min_count: int, top: int, workers: int, threshold: float):
+    """
+    메인 함수
+    """
+    print("=" * 60)
+    print("자주 묻는 질문 답변 사전 생성 시작")
+    print("=" * 60)
+
+    db = SessionLocal()
+    try:
+        corpus_version = VectorDBService().corpus_version()
+        print(f"\n1. 현재 코퍼스 버전: {corpus_version}")
+
+        deleted = db.query(PrecomputedAnswer).filter(
+            PrecomputedAnswer.corpus_version != corpus_version
+        ).delete(synchronize_session=False)
+        db.commit()
+        print(f"   이전 버전 답변 {deleted}건 삭제됨")
+
+        print(f"\n2. 최근 {days}일 질문 분석 중...")
+        clusters = mine_frequent_questions(db, RAGService(), days, min_count, top, threshold)
+
+        # A cluster already answered for this version is one whose centroid a stored one would match
+        existing: Dict[str, List] = defaultdict(list)
+        for row in db.query(PrecomputedAnswer.subject, PrecomputedAnswer.centroid).filter(
+            PrecomputedAnswer.corpus_version == corpus_version
+        ):
+            existing[row.subject].append(blob_to_centroid(row.centroid))
+        pending = [
+            c for c in clusters
+            if not any(
+                stored.shape == c["centroid"].shape and float(stored @ c["centroid"]) >= threshold
+                for stored in existing[c["subject"]]
+            )
+        ]
+        print(f"   자주 묻는 질문 유형: {len(clusters)}개 (신규 생성 대상: {len(pending)}개)")
+
+        print(f"\n3. 답변 생성 중 (workers={workers})...")
+        created = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(generate_answer, c["subject"], c["question"]): c
+                for c in pending
+            }
+            for future in as_completed(futures):
+                cluster = futures[future]
+                try:
+                    answer = future.result()
+                except Exception as e:
+                    print(f"   - 실패 [{cluster['subject']}] {cluster['question'][:30]}: {e}")
+                    continue
+
+                db.add(PrecomputedAnswer(
+                    subject=cluster["subject"],
+                    question=cluster["question"],
+                    answer=answer,
+                    centroid=centroid_to_blob(cluster["centroid"]),
+                    corpus_version=corpus_version,
+                    source_count=cluster["count"]
+                ))
+                db.commit()
+                created += 1
+                print(f"   - [{cluster['subject']}] {cluster['question'][:30]} ({cluster['count']}회)")
+
+        print(f"\n   {created}건 저장 완료")
+    finally:
+        db.close()
+
+    print("\n" + "=" * 60)
+    print("답변 사전 생성 완료!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="자주 묻는 질문 답변 사전 생성")
+    parser.add_argument("--days", type=int, default=90, help="분석할 최근 기간 (일)")
+    parser.add_argument("--min-count", type=int, default=3, help="사전 생성할 최소 질문 횟수")
+    parser.add_argument("--top", type=int, default=20, help="과목별 최대 질문 유형 수")
+    parser.add_argument("--workers", type=int, default=4, help="동시 답변 생성 수")
+    parser.add_argument(
+        "--threshold", type=float, default=get_settings().PRECOMPUTED_MATCH_THRESHOLD,
+        help="같은 질문 유형으로 묶을 최소 코사인 유사도"
+    )
+    args = parser.parse_args()
+
+    pregenerate_answers(args.days, args.min_count, args.top, args.workers, args.threshold)
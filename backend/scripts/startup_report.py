@@ -0,0 +1,143 @@
+"""
+앱 시작 시간 리포트
+uvicorn 프로세스를 띄운 시점부터 `GET /health/ready`가 200을 돌려줄 때까지의 시간(준비 시간)을
+측정하고 예산과 비교합니다. `python -X importtime`으로 `app.main` import 비용의 내역도 보여주며,
+무거운 모듈(chromadb, openai 등)이 시작 경로에 들어오면 함께 표시합니다.
+
+준비 확인에는 DB 연결이 필요하므로 .env의 DATABASE_URL(또는 환경 변수)이 접속 가능해야 합니다.
+
+사용법:
+    python scripts/startup_report.py [--budget-ms 1000] [--runs 3] [--top 15]
+"""
+
+import argparse
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Modules that should only load on first use, never while importing the app.
+# (bcrypt itself is pulled in cheaply by pymysql -> cryptography, so passlib is checked instead.)
+LAZY_MODULES = ["chromadb", "openai", "numpy", "passlib", "onnxruntime"]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def measure_once() -> Tuple[float, List[Tuple[str, int, int, int]]]:
+    """
+    새 인터프리터에서 app.main을 import하고 (전체 ms, 모듈별 측정값)을 반환합니다.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True
+    )
+    if proc.returncode != 0:
+        print(proc.stderr)
+        raise SystemExit("ERROR: app.main import 실패")
+
+    modules = []
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        depth = len(indent) // 2
+        modules.append((name, int(self_us), int(cumulative_us), depth))
+        if depth == 0:
+            total_us += int(cumulative_us)
+    return total_us / 1000, modules
+
+
+def measure_ready(timeout_s: float = 30) -> float:
+    """
+    새 uvicorn 프로세스를 띄워 /health/ready가 200을 줄 때까지의 ms를 반환합니다.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    try:
+        while time.perf_counter() - start < timeout_s:
+            if proc.poll() is not None:
+                print(proc.stderr.read())
+                raise SystemExit("ERROR: 서버 시작 실패")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/ready", timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except (urllib.error.URLError, OSError):
+                # Not listening yet, or 503 while the database is unreachable
+                pass
+            time.sleep(0.01)
+        raise SystemExit(f"ERROR: {timeout_s:.0f}초 안에 준비되지 않음 (DATABASE_URL 확인)")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="앱 시작 시간 리포트")
+    parser.add_argument("--budget-ms", type=float, default=1000,
+                        help="프로세스 시작부터 /health/ready 200까지의 시간 예산 (ms)")
+    parser.add_argument("--runs", type=int, default=3, help="측정 횟수 (중앙값 사용)")
+    parser.add_argument("--top", type=int, default=15, help="표시할 모듈 수")
+    args = parser.parse_args()
+
+    ready_times = sorted(measure_ready() for _ in range(args.runs))
+    median_ready = statistics.median(ready_times)
+    runs = sorted((measure_once() for _ in range(args.runs)), key=lambda run: run[0])
+    totals = [total for total, _ in runs]
+    _, modules = runs[len(runs) // 2]
+
+    print("=" * 60)
+    print("앱 시작 시간 리포트")
+    print("=" * 60)
+    print(f"\n준비 시간 (ms, 프로세스 시작 -> /health/ready 200): {', '.join(f'{t:.0f}' for t in ready_times)}")
+    print(f"중앙값: {median_ready:.0f} ms / 예산: {args.budget_ms:.0f} ms")
+    print(f"\n그중 app.main import (ms): {', '.join(f'{t:.0f}' for t in totals)}")
+
+    top_level: Dict[str, int] = {}
+    for name, _, cumulative_us, depth in modules:
+        if depth <= 1:
+            root = name.split(".")[0]
+            top_level[root] = max(top_level.get(root, 0), cumulative_us)
+
+    print(f"\n누적 시간 상위 {args.top}개 패키지:")
+    for root, cumulative_us in sorted(top_level.items(), key=lambda x: -x[1])[:args.top]:
+        print(f"   {cumulative_us / 1000:8.1f} ms  {root}")
+
+    loaded = {name.split(".")[0] for name, *_ in modules}
+    eager = [name for name in LAZY_MODULES if name in loaded]
+    print("\n지연 로딩 대상 모듈:")
+    for name in LAZY_MODULES:
+        print(f"   - {name}: {'시작 시 로드됨 (확인 필요)' if name in eager else '지연 로딩'}")
+
+    over_budget = median_ready > args.budget_ms
+    print("\n" + "=" * 60)
+    print("결과: " + ("예산 초과" if over_budget or eager else "통과"))
+    print("=" * 60)
+    sys.exit(1 if over_budget or eager else 0)
+
+
+if __name__ == "__main__":
+    main()
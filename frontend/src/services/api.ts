@@ -16,7 +16,12 @@ export const chatAPI = {
     return response.data
   },
 
-  sendMessage: async (data: { subject: string; question: string }) => {
+  getTargets: async () => {
+    const response = await api.get('/api/chat/targets')
+    return response.data
+  },
+
+  sendMessage: async (data: { subject: string; question: string; university?: string; department?: string }) => {
     const response = await api.post('/api/chat', data)
     return response.data
   },